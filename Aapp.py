@@ -5,6 +5,8 @@ import uuid
 import os
 import requests
 import audiomain
+from audio_feedback import asr_whisper
+from audio_feedback.transcript_cache import get_transcript_cache
 import threading
 import time
 from tqdm import tqdm
@@ -104,7 +106,8 @@ def download_video(s3_url, output_path):
         print(f"[다운로드 예외] {e}")
         return False
 
-def process_audio(s3_url, analysis_id, presentation_id, callback_url):
+def process_audio(s3_url, analysis_id, presentation_id, callback_url, asr_profile=None, segment_sec=45,
+                  include_words=False):
     """Download video from s3_url, run audio analysis, and send result or failure callback."""
 
     set_status(analysis_id, "IN_PROGRESS")
@@ -126,7 +129,8 @@ def process_audio(s3_url, analysis_id, presentation_id, callback_url):
 
         try:
             # 2) 분석 실행
-            result_data = audiomain.amain(video_path, analysis_id, presentation_id)
+            result_data = audiomain.amain(video_path, analysis_id, presentation_id, asr_profile=asr_profile,
+                                          segment_sec=segment_sec, include_words=include_words)
             if not isinstance(result_data, dict):
                 raise ValueError("amain() 결과 형식이 dict가 아닙니다.")
 
@@ -163,6 +167,7 @@ def analyze_video():
     data = request.get_json()
     presentation_id = data.get("presentationId")
     s3_url = data.get("s3Url")
+    asr_profile = data.get("asrProfile")  # 선택: "accurate"(기본) 또는 "fast"
 
     # 클라이언트 IP 기반 콜백 URL 생성
     client_ip = request.remote_addr
@@ -170,6 +175,13 @@ def analyze_video():
 
     if not all([presentation_id, s3_url]):
         return jsonify({"error": "presentationId, s3Url은 필수입니다."}), 400
+    if asr_profile is not None and asr_profile not in asr_whisper.DECODE_PROFILES:
+        return jsonify({"error": f"asrProfile은 {', '.join(asr_whisper.DECODE_PROFILES)} 중 하나여야 합니다."}), 400
+    segment_sec = data.get("segmentSec", 45)  # 선택: 구간 길이(초) 또는 "sentence"
+    if segment_sec != "sentence" and (isinstance(segment_sec, bool) or not isinstance(segment_sec, (int, float))
+                                      or segment_sec <= 0):
+        return jsonify({"error": "segmentSec은 양수(초) 또는 \"sentence\"여야 합니다."}), 400
+    include_words = bool(data.get("includeWords", False))  # 선택: 결과에 단어 타임스탬프(열 단위) 포함
 
     analysis_id = f"audio-analysis-uuid-{uuid.uuid4()}"
 
@@ -179,7 +191,7 @@ def analyze_video():
     # 백그라운드 작업 시작 
     thread = threading.Thread(
         target=process_audio,
-        args=(s3_url, analysis_id, presentation_id, callback_url),
+        args=(s3_url, analysis_id, presentation_id, callback_url, asr_profile, segment_sec, include_words),
         daemon=False
     )
     thread.start()
@@ -189,5 +201,16 @@ def analyze_video():
         "analysisId": analysis_id,
         "status": "PENDING"
     })
+
+@app.route('/analysis/cache/stats', methods=['GET'])
+def transcript_cache_stats():
+    """전사 캐시 적중/미스 횟수와 크기 (캐시 용량 산정용)"""
+    cache = get_transcript_cache()
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(cache.stats(), enabled=True))
+
 if __name__ == '__main__':
+    # 오디오 전용 서버: 첫 요청이 모델 로드를 기다리지 않도록 기동 시 Whisper를 미리 로드
+    asr_whisper.get_backend().warm_up()
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,79 @@
+"""
+ASR 백엔드 비교 벤치마크.
+기준 엔진(PyTorch fp32, CPU)과 후보 엔진(기본: int8)으로 같은 오디오를 전사하고
+소요 시간, 단어 오류율(WER), 단어 타임스탬프 오차를 출력합니다.
+
+사용 예:
+    python asr_benchmark.py sample_input/123.mp4 temp_output/sample_audio.wav --candidate int8
+"""
+import argparse
+import json
+import os
+import time
+
+from audio_feedback.asr_metrics import word_error_rate, timestamp_drift
+from audio_feedback.asr_whisper import WhisperBackend, get_backend, transcribe_audio, DEFAULT_MODEL_SIZE
+from audio_feedback.audio_context import AudioContext
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg")
+
+
+def load_audio(path):
+    if os.path.splitext(path)[1].lower() in AUDIO_EXTENSIONS:
+        return AudioContext.from_file(path)
+    return AudioContext.from_video(path)
+
+
+def run_backend(backend, audio):
+    # 캐시된 결과를 읽으면 측정이 무의미하므로 항상 실제로 전사합니다.
+    start = time.time()
+    text, duration, words = transcribe_audio(audio, backend=backend, use_cache=False)
+    return {"text": text, "duration": duration, "words": words, "elapsed": time.time() - start}
+
+
+def benchmark(paths, candidate="int8", model_size=DEFAULT_MODEL_SIZE):
+    reference_backend = WhisperBackend(model_size, device="cpu", precision="fp32")
+    candidate_backend = get_backend(candidate, model_size)
+    # 모델 로드 시간은 측정에서 제외합니다.
+    reference_backend.warm_up()
+    candidate_backend.warm_up()
+
+    rows = []
+    for path in paths:
+        audio = load_audio(path)
+        reference = run_backend(reference_backend, audio)
+        result = run_backend(candidate_backend, audio)
+        rows.append({
+            "file": path,
+            "audio_sec": round(audio.duration, 2),
+            "reference_sec": round(reference["elapsed"], 2),
+            "candidate_sec": round(result["elapsed"], 2),
+            "speedup": round(reference["elapsed"] / result["elapsed"], 2) if result["elapsed"] > 0 else 0.0,
+            "wer": round(word_error_rate(reference["text"], result["text"]), 4),
+            "timestamp_drift": timestamp_drift(reference["words"], result["words"]),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASR 백엔드 정확도/속도 비교")
+    parser.add_argument("paths", nargs="+", help="오디오 또는 영상 파일")
+    parser.add_argument("--candidate", default="int8", help="비교할 백엔드 이름")
+    parser.add_argument("--model-size", default=DEFAULT_MODEL_SIZE)
+    parser.add_argument("--output", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    rows = benchmark(args.paths, args.candidate, args.model_size)
+    for row in rows:
+        drift = row["timestamp_drift"]
+        print(f"{row['file']}: {row['audio_sec']}s | fp32 {row['reference_sec']}s -> "
+              f"{args.candidate} {row['candidate_sec']}s (x{row['speedup']}) | WER {row['wer']:.2%} | "
+              f"drift mean {drift['mean_sec']}s p95 {drift['p95_sec']}s max {drift['max_sec']}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,37 @@ import librosa
 import numpy as np
 from audio_feedback.speaking_rate import calculate_speaking_rate
 from audio_feedback.asr_whisper import transcribe_audio
-import os
-import subprocess
+from audio_feedback.audio_context import as_audio_context
+from audio_feedback.audio_context import AudioContext
+from audio_feedback.pitch_tracker import track_pitch
+from audio_feedback.word_table import as_word_table
+from audio_feedback.vad import detect_speech_regions
 
-def analyze_audio_features(audio_path):
-    if not os.path.exists(audio_path):
-        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+def analyze_audio_features(audio, vad_gating=False, asr_workers=None, asr_profile=None):
+    # audio: 오디오 파일 경로 또는 AudioContext (한 번 디코딩한 버퍼를 공유)
+    # vad_gating: True면 RMS로 찾은 발화 구간만 Whisper로 전사합니다. (긴 침묵/준비 시간 생략)
+    # asr_workers: 2 이상이면 쉼 경계로 나눈 청크를 프로세스 풀에서 병렬 전사합니다.
+    # asr_profile: Whisper 디코딩 프로필 이름 ("accurate", "fast")
+    audio = as_audio_context(audio)
+    duration = audio.duration
 
-    y, sr = librosa.load(audio_path, sr=16000)
-    duration = librosa.get_duration(y=y, sr=sr)
+    # 평균 RMS 값 대신 프레임별 RMS 값 전체를 반환합니다.
+    rms_frames = audio.rms(frame_length=2048, hop_length=512)
+
+    speech_regions = detect_speech_regions(rms_frames, sr=audio.sr, hop_length=512) if vad_gating else None
+    transcript, asr_duration, word_timestamps = transcribe_audio(audio, speech_regions=speech_regions,
+                                                                workers=asr_workers, profile=asr_profile,
+                                                                rms_frames=rms_frames)
 
-    transcript, asr_duration, word_timestamps = transcribe_audio(audio_path)
+    # 문장 분할은 전사 직후 한 번만 하고, 문장을 쓰는 모든 단계(음량/말더듬/구간)가 이 목록(id 포함)을 공유합니다.
+    sentences = as_word_table(word_timestamps).sentences()
 
     effective_duration = asr_duration if asr_duration > 0 else duration
     speaking_rate = calculate_speaking_rate(transcript, effective_duration)
 
-    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-    pitch_values = pitches[magnitudes > np.median(magnitudes)]
-    avg_pitch = np.mean(pitch_values) if len(pitch_values) > 0 else 0
-
-    # 평균 RMS 값 대신 프레임별 RMS 값 전체를 반환합니다.
-    rms_frames = librosa.feature.rms(y=y, frame_length=2048, hop_length=512)[0]
+    # 파일당 한 번 프레임별 f0 트랙을 만들고, 구간 피치는 이 트랙을 잘라 계산합니다.
+    pitch_track = track_pitch(audio, hop_length=512)
+    avg_pitch = pitch_track.mean()
     
     # 평균 RMS 값도 함께 반환하여 기존 기능 유지
     avg_rms = np.mean(rms_frames)
@@ -35,40 +45,40 @@ def analyze_audio_features(audio_path):
         "avg_pitch_hz": avg_pitch,
         "avg_rms": avg_rms,
         "rms_frames": rms_frames,
-        "word_timestamps": word_timestamps
+        "pitch_track": pitch_track,
+        "word_timestamps": word_timestamps,
+        "sentences": sentences
     }
 
-def analyze_audio_segment(audio_path, start_time_sec, end_time_sec, word_timestamps):
+def analyze_audio_segment(audio, start_time_sec, end_time_sec, word_timestamps, pitch_track=None):
     """
     Analyzes a specific segment of the audio file.
     Args:
-        audio_path (str): Path to the audio file.
+        audio (str or AudioContext): Path to the audio file, or the shared decoded audio.
         start_time_sec (float): Start time of the segment in seconds.
         end_time_sec (float): End time of the segment in seconds.
-        word_timestamps (list): List of all word timestamps from the full audio.
+        word_timestamps (WordTable or list): Word timestamps from the full audio.
+        pitch_track (PitchTrack, optional): Whole-file f0 track from analyze_audio_features.
+            If given, the segment pitch is sliced from it instead of being re-estimated.
     Returns:
         dict: A dictionary containing analysis results for the segment.
     """
-    if not os.path.exists(audio_path):
-        raise FileNotFoundError(f"Audio file not found: {audio_path}")
-
-    y, sr = librosa.load(audio_path, sr=16000, offset=start_time_sec, duration=end_time_sec - start_time_sec)
+    audio = as_audio_context(audio)
+    # 다시 디코딩하지 않고 공유 버퍼의 view만 잘라 씁니다.
+    y, sr = audio.segment(start_time_sec, end_time_sec), audio.sr
     
     segment_duration = librosa.get_duration(y=y, sr=sr)
     
     # Transcript for the segment
-    segment_words = [
-        word for word in word_timestamps
-        if start_time_sec <= word['start'] < end_time_sec
-    ]
-    segment_text = " ".join([word['word'] for word in segment_words])
+    segment_text = " ".join(as_word_table(word_timestamps).time_slice(start_time_sec, end_time_sec).words)
     
     speaking_rate = calculate_speaking_rate(segment_text, segment_duration)
 
     # Pitch analysis for the segment
-    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-    pitch_values = pitches[magnitudes > np.median(magnitudes)]
-    avg_pitch = np.mean(pitch_values) if len(pitch_values) > 0 else 0
+    if pitch_track is not None:
+        avg_pitch = pitch_track.mean(start_time_sec, end_time_sec)
+    else:
+        avg_pitch = track_pitch(AudioContext(y, sr)).mean()
 
     return {
         "start_time_sec": start_time_sec,
@@ -0,0 +1,206 @@
+# audio_feedback/asr_batcher.py
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from audio_feedback.asr_chunked import plan_chunks, stitch_results
+
+WINDOW_SAMPLES = 16000 * 30  # Whisper 입력 창 (30초)
+TIME_PRECISION = 0.02        # 타임스탬프 토큰 하나의 시간 (초)
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+
+
+class _Request:
+    def __init__(self, mel, options_key):
+        self.mel = mel
+        self.options_key = options_key
+        self.future = Future()
+
+
+class WhisperBatcher:
+    """
+    여러 작업(job)에서 들어오는 30초 mel 창을 모아 한 번의 encoder/decoder 호출로 처리하는 서비스.
+    max_wait_ms 동안 요청을 모으거나 max_batch개가 차면 배치를 실행하고,
+    결과(DecodingResult)를 각 요청의 Future로 돌려줍니다.
+    """
+
+    def __init__(self, backend, max_batch=8, max_wait_ms=50):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.windows = 0
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, mel, **options):
+        """mel: (80, 3000) 텐서. options: DecodingOptions 인자 (language 등)"""
+        request = _Request(mel, tuple(sorted(options.items())))
+        self._queue.put(request)
+        return request.future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            # 디코딩 옵션이 같은 요청끼리만 한 배치로 묶습니다.
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.options_key, []).append(request)
+            for options_key, requests in groups.items():
+                self._run(requests, dict(options_key))
+
+    def _run(self, requests, options):
+        import torch
+        import whisper
+
+        try:
+            entry = self.backend.entry()
+            fp16 = entry.precision == "fp16"
+            mels = torch.stack([request.mel for request in requests]).to(entry.model.device)
+            mels = mels.to(torch.float16 if fp16 else torch.float32)
+            decoding_options = whisper.DecodingOptions(fp16=fp16, **options)
+            with entry.lock:
+                results = entry.model.decode(mels, decoding_options)
+            self.batches += 1
+            self.windows += len(requests)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+        for request, result in zip(requests, results):
+            request.future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "windows": self.windows,
+            "avg_batch_size": round(self.windows / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(backend):
+    """백엔드 모델 스펙별로 하나의 배처를 공유합니다."""
+    key = (backend.name, backend.spec())
+    with _batchers_lock:
+        if key not in _batchers:
+            max_batch = int(os.environ.get("ASR_MAX_BATCH", 8))
+            max_wait_ms = float(os.environ.get("ASR_BATCH_WAIT_MS", 50))
+            _batchers[key] = WhisperBatcher(backend, max_batch, max_wait_ms)
+        return _batchers[key]
+
+
+def _segments_from_tokens(result, tokenizer, duration):
+    """DecodingResult의 타임스탬프 토큰으로 Whisper transcribe와 같은 형식의 segment 목록을 만듭니다."""
+    tokens = list(result.tokens)
+    timestamp_begin = tokenizer.timestamp_begin
+    is_timestamp = [token >= timestamp_begin for token in tokens]
+
+    def new_segment(start, end, segment_tokens):
+        text_tokens = [token for token in segment_tokens if token < tokenizer.eot]
+        return {
+            "seek": 0,
+            "start": start,
+            "end": end,
+            "text": tokenizer.decode(text_tokens),
+            "tokens": segment_tokens,
+            "temperature": result.temperature,
+            "avg_logprob": result.avg_logprob,
+            "compression_ratio": result.compression_ratio,
+            "no_speech_prob": result.no_speech_prob,
+        }
+
+    def timestamp(token):
+        return (token - timestamp_begin) * TIME_PRECISION
+
+    segments = []
+    consecutive = [i + 1 for i in range(len(tokens) - 1) if is_timestamp[i] and is_timestamp[i + 1]]
+    if consecutive:
+        single_timestamp_ending = is_timestamp[-2:] == [False, True]
+        slices = consecutive + ([len(tokens)] if single_timestamp_ending else [])
+        last = 0
+        for current in slices:
+            sliced = tokens[last:current]
+            segments.append(new_segment(timestamp(sliced[0]), timestamp(sliced[-1]), sliced))
+            last = current
+        # 끝 타임스탬프 없이 남은 토큰: 창 끝까지 이어지는 발화로 봅니다. (창을 다시 seek하지 않으므로)
+        tail = tokens[last:]
+        if any(not flag for flag in is_timestamp[last:]):
+            start = timestamp(tail[0]) if is_timestamp[last] else segments[-1]["end"]
+            segments.append(new_segment(start, duration, tail))
+    elif tokens:
+        end = duration
+        timestamps = [token for token in tokens if token >= timestamp_begin]
+        if timestamps and timestamps[-1] != timestamp_begin:
+            end = timestamp(timestamps[-1])
+        segments.append(new_segment(0.0, end, tokens))
+    return segments
+
+
+def transcribe_batched(audio, backend, word_timestamps=True, **options):
+    """
+    AudioContext를 30초 이하 청크(쉼 경계)로 나눠 공유 배처에 제출하고,
+    다른 작업의 창과 함께 배치 디코딩된 결과를 모아 Whisper 결과 형식의 dict를 반환합니다.
+    창마다 독립적으로 디코딩하므로 이전 창 텍스트를 조건으로 쓰지 않습니다.
+    """
+    import whisper
+    from whisper.timing import add_word_timestamps
+    from whisper.tokenizer import get_tokenizer
+
+    batcher = get_batcher(backend)
+    # 청크 길이 = 컷 간격(최대 28초) + 겹침(양쪽 1초) <= 30초
+    chunks = plan_chunks(audio.rms(frame_length=2048, hop_length=512), audio.sr, 512,
+                         target_sec=25.0, search_sec=3.0, overlap_sec=1.0)
+
+    windows = []
+    for start, end, _, _ in chunks:
+        samples = audio.read(int(round(start * audio.sr)), int(round(end * audio.sr)))[:WINDOW_SAMPLES]
+        mel = whisper.pad_or_trim(whisper.log_mel_spectrogram(np.ascontiguousarray(samples)), whisper.audio.N_FRAMES)
+        windows.append((mel, len(samples), batcher.submit(mel, **options)))
+
+    entry = backend.entry()
+    chunk_results = []
+    for chunk, (mel, num_samples, future) in zip(chunks, windows):
+        result = future.result()
+        duration = num_samples / float(audio.sr)
+        segments = []
+        skip = result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+        if not skip:
+            tokenizer = get_tokenizer(entry.model.is_multilingual, language=result.language, task="transcribe")
+            segments = _segments_from_tokens(result, tokenizer, duration)
+            if word_timestamps and segments:
+                # 단어 정렬(cross-attention DTW)은 창 단위로 수행합니다.
+                with entry.lock:
+                    add_word_timestamps(segments=segments, model=entry.model, tokenizer=tokenizer,
+                                        mel=mel.to(entry.model.device), num_frames=num_samples // 160)
+        chunk_results.append((chunk, {"segments": segments}))
+    return stitch_results(chunk_results)
+
+
+def batcher_stats():
+    """모델 스펙별 배처의 누적 배치 수/평균 배치 크기 (동시 부하에서 배치가 실제로 모이는지 확인용)"""
+    with _batchers_lock:
+        return {"/".join(str(part) for part in key): batcher.stats() for key, batcher in _batchers.items()}
@@ -0,0 +1,150 @@
+# audio_feedback/asr_chunked.py
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from audio_feedback.vad import SILENCE_THRESHOLD
+
+_pools = {}  # workers -> ProcessPoolExecutor
+_pool_lock = threading.Lock()
+
+
+def plan_chunks(rms_frames, sr=16000, hop_length=512, target_sec=120.0, search_sec=15.0,
+                overlap_sec=1.0, pause_sec=0.3):
+    """
+    오디오를 약 target_sec 길이의 청크로 나눌 경계를 정합니다.
+    목표 지점 앞뒤 search_sec 안에서 pause_sec 동안의 평균 RMS가 가장 낮은 곳(쉼)에서 자르고,
+    그곳도 무음이 아니면 단어가 잘리지 않도록 overlap_sec 만큼 겹쳐서 자릅니다.
+
+    Returns:
+        [(start_sec, end_sec, keep_from_sec, keep_to_sec), ...]
+        청크는 [start, end)를 전사하고, 결과 중 [keep_from, keep_to)에서 시작하는 단어만 사용합니다.
+    """
+    rms_frames = np.asarray(rms_frames, dtype=np.float64)
+    frame_sec = hop_length / float(sr)
+    total_sec = len(rms_frames) * frame_sec
+    if total_sec <= target_sec + search_sec:
+        return [(0.0, total_sec, 0.0, total_sec)]
+
+    # pause_sec 이동 평균 (누적합)
+    width = max(1, int(pause_sec / frame_sec))
+    csum = np.concatenate([[0.0], np.cumsum(rms_frames)])
+    moving = (csum[width:] - csum[:-width]) / width
+
+    cuts = []  # (cut_sec, is_silent)
+    last = 0.0
+    while total_sec - last > target_sec + search_sec:
+        lo = int((last + target_sec - search_sec) / frame_sec)
+        hi = min(int((last + target_sec + search_sec) / frame_sec), len(moving))
+        best = lo + int(np.argmin(moving[lo:hi]))
+        cut = (best + width / 2.0) * frame_sec
+        cuts.append((cut, moving[best] < SILENCE_THRESHOLD))
+        last = cut
+
+    chunks = []
+    bounds = [(0.0, True)] + cuts + [(total_sec, True)]
+    for (left, left_silent), (right, right_silent) in zip(bounds[:-1], bounds[1:]):
+        start = left if left_silent else max(0.0, left - overlap_sec)
+        end = right if right_silent else min(total_sec, right + overlap_sec)
+        chunks.append((start, end, left, right))
+    return chunks
+
+
+def _init_worker(torch_threads):
+    import torch
+    torch.set_num_threads(torch_threads)
+
+
+def _transcribe_chunk(samples, backend, options):
+    # backend는 호출한 쪽의 WhisperBackend 인스턴스(모델 크기/장치/정밀도 설정만 담김)입니다.
+    # 워커 프로세스마다 자체 레지스트리에서 모델을 한 번 로드해 재사용합니다.
+    return backend.transcribe(samples, **options)
+
+
+def _get_pool(workers):
+    # 워커 수마다 풀을 하나씩 두고 계속 재사용합니다. 다른 요청이 아직 쓰고 있을 수 있으므로
+    # 워커 수가 다른 요청이 와도 기존 풀을 내리지 않습니다.
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // workers)
+            # 서버 스레드/torch 스레드 풀 상태를 fork로 물려받지 않도록 spawn 프로세스를 사용합니다.
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker, initargs=(torch_threads,))
+            _pools[workers] = pool
+        return pool
+
+
+def _shift_and_filter(result, offset, keep_from, keep_to):
+    """
+    청크 결과의 시각을 offset만큼 옮기고 [keep_from, keep_to)에서 시작하는 단어만 남깁니다.
+    단어 시각이 없는 결과(word_timestamps=False)는 segment 중앙이 이 구간에 있는 segment를 남깁니다.
+    청크 앞쪽 여유 구간에서 시작한 segment도 대부분이 이 청크 몫이면 버려지지 않습니다.
+    """
+    segments = []
+    for segment in result["segments"]:
+        words = []
+        for word in segment.get("words", []):
+            start, end = word["start"] + offset, word["end"] + offset
+            if keep_from <= start < keep_to:
+                words.append(dict(word, start=start, end=end))
+        start, end = segment["start"] + offset, segment["end"] + offset
+        if "words" in segment:
+            if not words:
+                continue
+            start, end = words[0]["start"], words[-1]["end"]
+            text = "".join(w["word"] for w in words)
+        elif not keep_from <= (start + end) / 2 < keep_to:
+            continue
+        else:
+            text = segment["text"]
+        segments.append(dict(segment, start=start, end=end, text=text, words=words))
+    return segments
+
+
+def stitch_results(chunk_results):
+    """
+    [(청크 계획, 결과), ...]를 하나의 Whisper 결과 형식으로 합칩니다.
+    겹친 구간은 경계 기준으로 한쪽 청크의 단어만 남기고,
+    단어 시각이 단조 증가하도록 앞 단어와 겹치는 시작 시각은 앞 단어 끝으로 맞춥니다.
+    """
+    segments = []
+    last_end = 0.0
+    for (start, _, keep_from, keep_to), result in chunk_results:
+        for segment in _shift_and_filter(result, start, keep_from, keep_to):
+            for word in segment["words"]:
+                if word["start"] < last_end:
+                    word["start"] = last_end
+                word["end"] = max(word["end"], word["start"])
+                last_end = word["end"]
+            if segment["words"]:
+                segment["start"] = segment["words"][0]["start"]
+            segments.append(segment)
+    return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+
+
+def transcribe_chunked(audio, backend, workers=None, target_sec=120.0, **options):
+    """
+    AudioContext를 쉼 경계에서 청크로 나눠 프로세스 풀에서 병렬로 전사하고,
+    단어 타임스탬프를 하나의 단조 증가 목록으로 이어 붙인 Whisper 결과 형식의 dict를 반환합니다.
+    backend: 워커로 그대로 넘겨 장치/정밀도/초안 모델 등 호출한 쪽 설정으로 전사합니다.
+    """
+    workers = workers or max(1, (os.cpu_count() or 1) // 2)
+    chunks = plan_chunks(audio.rms(frame_length=2048, hop_length=512), audio.sr, 512, target_sec)
+    pool = _get_pool(workers)
+
+    # 청크 신호를 한꺼번에 만들지 않도록 동시에 제출하는 청크 수를 workers * 2로 제한합니다.
+    results = [None] * len(chunks)
+    pending = {}
+    for index, (start, end, _, _) in enumerate(chunks):
+        if len(pending) >= workers * 2:
+            done = min(pending)
+            results[done] = pending.pop(done).result()
+        samples = audio.read(int(round(start * audio.sr)), int(round(end * audio.sr)))
+        pending[index] = pool.submit(_transcribe_chunk, samples, backend, options)
+    for index, future in pending.items():
+        results[index] = future.result()
+    return stitch_results(list(zip(chunks, results)))
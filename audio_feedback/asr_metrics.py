@@ -0,0 +1,74 @@
+# audio_feedback/asr_metrics.py
+import difflib
+import re
+
+import numpy as np
+
+_PUNCT_RE = re.compile(r"[^\w\s']")
+
+
+def normalize_words(words):
+    """
+    WER 비교용 정규화: 소문자, 구두점 제거, 공백 분리.
+    words: 문자열(전사문) 또는 word_timestamps 리스트
+    """
+    if isinstance(words, str):
+        text = words
+    else:
+        text = " ".join(w['word'] for w in words)
+    return _PUNCT_RE.sub(" ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    단어 단위 편집 거리 / 기준 단어 수.
+    reference, hypothesis: 문자열 또는 word_timestamps 리스트
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    # 행 두 개만 유지하는 Levenshtein DP
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / float(len(ref))
+
+
+def matched_word_pairs(reference_words, hypothesis_words):
+    """
+    두 word_timestamps 리스트에서 정규화한 단어가 같은 것끼리 순서대로 짝지어
+    (기준 단어, 비교 단어) 목록을 반환합니다.
+    """
+    ref_keys = [" ".join(normalize_words(w['word'])) for w in reference_words]
+    hyp_keys = [" ".join(normalize_words(w['word'])) for w in hypothesis_words]
+    matcher = difflib.SequenceMatcher(None, ref_keys, hyp_keys, autojunk=False)
+    pairs = []
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            pairs.append((reference_words[block.a + k], hypothesis_words[block.b + k]))
+    return pairs
+
+
+def timestamp_drift(reference_words, hypothesis_words):
+    """
+    짝지어진 단어들의 시작/끝 시각 차이(초) 통계를 반환합니다.
+    """
+    pairs = matched_word_pairs(reference_words, hypothesis_words)
+    if not pairs:
+        return {"matched_words": 0, "mean_sec": 0.0, "p95_sec": 0.0, "max_sec": 0.0}
+
+    diffs = np.array([
+        max(abs(ref['start'] - hyp['start']), abs(ref['end'] - hyp['end']))
+        for ref, hyp in pairs
+    ])
+    return {
+        "matched_words": len(pairs),
+        "mean_sec": round(float(np.mean(diffs)), 4),
+        "p95_sec": round(float(np.percentile(diffs, 95)), 4),
+        "max_sec": round(float(np.max(diffs)), 4),
+    }
@@ -1,30 +1,383 @@
 # audio_feedback/asr_whisper.py
-import whisper
-import torch
+import os
+import threading
+from importlib import metadata
 
-def load_model():
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = whisper.load_model("base", device=device)
+from audio_feedback.audio_context import AudioContext, as_audio_context
+from audio_feedback.vad import compact_audio, remap_transcription
+from audio_feedback.asr_chunked import transcribe_chunked, stitch_results
+from audio_feedback.asr_batcher import transcribe_batched
+from audio_feedback.transcript_cache import get_transcript_cache
+from audio_feedback.word_timing import add_word_timing
+from audio_feedback.word_table import WordTable
+
+DEFAULT_MODEL_SIZE = "base"
+DEFAULT_PROFILE = "accurate"
+
+# 디코딩 프로필: 언어 고정 여부, beam/best_of, temperature fallback 단계, 단어 정렬(DTW) 여부
+DECODE_PROFILES = {
+    # 기존 transcribe(word_timestamps=True) 호출과 같은 디코딩: 파일마다 언어 감지,
+    # 어려운 구간은 temperature를 올려 재시도(단계마다 샘플 1개, best_of=None), DTW 단어 정렬
+    "accurate": {
+        "language": None,
+        "beam_size": None,
+        "best_of": None,
+        "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        "condition_on_previous_text": True,
+        "word_timing": "dtw",
+    },
+    # 지연 시간 예측 가능: 한국어 고정, greedy 1회 디코딩(fallback 없음),
+    # 단어 시각은 DTW 정렬 대신 segment 시각과 RMS 포락선으로 근사
+    "fast": {
+        "language": "ko",
+        "beam_size": None,
+        "best_of": None,
+        "temperature": 0.0,
+        "condition_on_previous_text": False,
+        "word_timing": "energy",
+    },
+}
+
+
+def _default_device():
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _default_precision(device):
+    return "fp16" if device == "cuda" else "fp32"
+
+
+def quantize_int8(model):
+    """
+    Whisper 모델의 Linear 층을 int8 dynamic quantization으로 바꿉니다. (CPU 전용)
+    whisper.model.Linear는 forward만 덮어쓴 nn.Linear 하위 클래스라서
+    quantize_dynamic이 알아보도록 먼저 nn.Linear로 되돌립니다.
+    """
+    import torch
+    import whisper.model
+
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_model(size=DEFAULT_MODEL_SIZE, device=None, precision=None):
+    # whisper/torch는 실제로 모델이 필요할 때만 import합니다. (비디오 전용 워커의 기동 비용 절감)
+    import whisper
+    device = device or _default_device()
+    if precision == "int8":
+        if device != "cpu":
+            raise ValueError("int8 Whisper는 CPU에서만 지원합니다.")
+        return quantize_int8(whisper.load_model(size, device="cpu")).eval()
+    model = whisper.load_model(size, device=device)
     return model
 
-model = load_model()
 
-def transcribe_audio(audio_path):
-    # 단어별 타임스탬프를 얻기 위해 word_timestamps=True를 사용
-    result = model.transcribe(audio_path, word_timestamps=True)
+class _ModelEntry:
+    def __init__(self, model, precision):
+        self.model = model
+        self.precision = precision
+        # Whisper 디코더는 추론 중 모델에 kv-cache hook을 붙이므로
+        # 같은 모델 인스턴스에서 동시에 transcribe하면 안 됩니다.
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    (size, device, precision) 별로 Whisper 모델을 한 번만 로드해 공유하는 레지스트리.
+    처음 사용할 때 로드하며, 서버 기동 시 warm_up()으로 미리 로드할 수도 있습니다.
+    여러 요청 스레드에서 동시에 접근해도 안전합니다.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    @staticmethod
+    def _key(size=DEFAULT_MODEL_SIZE, device=None, precision=None):
+        device = device or _default_device()
+        precision = precision or _default_precision(device)
+        return (size, device, precision)
+
+    def get(self, size=DEFAULT_MODEL_SIZE, device=None, precision=None):
+        key = self._key(size, device, precision)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # 모델 로드는 오래 걸리므로 키별 락만 잡고, 다른 키의 조회는 막지 않습니다.
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                entry = _ModelEntry(load_model(*key), key[2])
+                with self._lock:
+                    self._entries[key] = entry
+        return entry
+
+    def warm_up(self, specs=None):
+        """specs: [(size, device, precision), ...] 생략하면 기본 모델만 로드합니다."""
+        for spec in specs or [(DEFAULT_MODEL_SIZE, None, None)]:
+            self.get(*spec)
+
+    def loaded(self):
+        with self._lock:
+            return list(self._entries)
+
+
+registry = ModelRegistry()
+
+
+def warm_up(specs=None):
+    registry.warm_up(specs)
+
+
+class WhisperBackend:
+    """
+    transcribe_audio 뒤의 ASR 엔진 인터페이스.
+    transcribe()는 Whisper의 transcribe 결과와 같은 형식의 dict(text, segments[words])를 반환합니다.
+    기본 구현은 PyTorch Whisper (GPU면 fp16, CPU면 fp32) 입니다.
+    """
+
+    name = "torch"
+
+    def __init__(self, model_size=DEFAULT_MODEL_SIZE, device=None, precision=None):
+        self.model_size = model_size
+        self.device = device
+        self.precision = precision
+
+    def spec(self):
+        return ModelRegistry._key(self.model_size, self.device, self.precision)
+
+    def entry(self):
+        return registry.get(*self.spec())
+
+    def warm_up(self):
+        self.entry()
+
+    def transcribe(self, audio, **options):
+        entry = self.entry()
+        with entry.lock:
+            return entry.model.transcribe(audio, fp16=entry.precision == "fp16", **options)
+
+
+class Int8CpuBackend(WhisperBackend):
+    """Linear 층을 int8로 dynamic quantization한 CPU 전용 Whisper"""
+
+    name = "int8"
+
+    def __init__(self, model_size=DEFAULT_MODEL_SIZE):
+        super().__init__(model_size, device="cpu", precision="int8")
+
+
+class SpeculativeBackend(WhisperBackend):
+    """
+    2단계(tiny-first) 전사.
+    작은 초안 모델로 전체를 먼저 전사하고, avg_logprob가 낮거나 no_speech_prob가 높은
+    segment만 큰 모델(model_size)로 다시 디코딩해 그 구간의 단어를 바꿔 끼웁니다.
+    깨끗한 녹음은 초안 모델 속도로, 어려운 구간은 큰 모델 품질로 전사됩니다.
+    초안 모델은 ASR_DRAFT_MODEL 환경 변수(기본 "tiny")로 정합니다.
+    """
+
+    name = "speculative"
+
+    def __init__(self, model_size=DEFAULT_MODEL_SIZE, draft_size=None, logprob_threshold=-0.7,
+                 no_speech_threshold=0.5, pad_sec=0.5):
+        super().__init__(model_size)
+        self.draft = WhisperBackend(draft_size or os.environ.get("ASR_DRAFT_MODEL", "tiny"))
+        self.logprob_threshold = logprob_threshold
+        self.no_speech_threshold = no_speech_threshold
+        self.pad_sec = pad_sec
+
+    def spec(self):
+        return super().spec() + ("draft",) + self.draft.spec() + (self.logprob_threshold, self.no_speech_threshold)
+
+    def entry(self):
+        # 배치 경로 등 모델 하나만 쓰는 곳에서는 큰 모델을 사용합니다.
+        return registry.get(*WhisperBackend.spec(self))
+
+    def warm_up(self):
+        self.entry()
+        self.draft.warm_up()
+
+    def _needs_escalation(self, segment):
+        return (segment["avg_logprob"] < self.logprob_threshold
+                or segment["no_speech_prob"] > self.no_speech_threshold)
+
+    def transcribe(self, audio, **options):
+        if isinstance(audio, str):
+            import whisper
+            audio = whisper.load_audio(audio)
+        draft = self.draft.transcribe(audio, **options)
+
+        # 연속된 재디코딩 대상 segment를 하나의 구간으로 묶습니다.
+        pieces = []  # [(escalate, [segment, ...]), ...]
+        for segment in draft["segments"]:
+            escalate = self._needs_escalation(segment)
+            if pieces and pieces[-1][0] == escalate:
+                pieces[-1][1].append(segment)
+            else:
+                pieces.append((escalate, [segment]))
+
+        sr = 16000
+        total_sec = len(audio) / float(sr)
+        everything = (0.0, None, float("-inf"), float("inf"))
+        chunk_results, escalated = [], []
+        for escalate, segments in pieces:
+            if not escalate:
+                chunk_results.append((everything, {"segments": segments}))
+                continue
+            keep_from, keep_to = segments[0]["start"], segments[-1]["end"]
+            start, end = max(0.0, keep_from - self.pad_sec), min(total_sec, keep_to + self.pad_sec)
+            # 큰 모델 결과 중 초안 segment 구간에서 시작하는 단어만 남기고 원래 시각으로 옮깁니다.
+            # 단어 시각 없이 디코딩하는 프로필("fast")은 segment 중앙이 이 구간에 있는 segment를 남깁니다.
+            result = WhisperBackend.transcribe(self, audio[int(round(start * sr)):int(round(end * sr))], **options)
+            chunk_results.append(((start, end, keep_from, keep_to), result))
+            escalated.append((keep_from, keep_to))
+
+        result = stitch_results(chunk_results)
+        result["escalated"] = escalated
+        return result
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    Int8CpuBackend.name: Int8CpuBackend,
+    SpeculativeBackend.name: SpeculativeBackend,
+}
+
+
+def whisper_version():
+    """설치된 openai-whisper 패키지 버전. 버전이 바뀌면 같은 모델 이름도 다른 체크포인트/디코더일 수 있습니다."""
+    try:
+        return metadata.version("openai-whisper")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def get_backend(name=None, model_size=DEFAULT_MODEL_SIZE):
+    """
+    ASR 백엔드를 반환합니다. name을 생략하면 배포 설정(ASR_BACKEND 환경 변수, 기본 "torch")을 따릅니다.
+    """
+    name = name or os.environ.get("ASR_BACKEND", WhisperBackend.name)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend: {name} (available: {', '.join(BACKENDS)})")
+    return BACKENDS[name](model_size)
+
+
+def get_profile(name=None):
+    """디코딩 프로필 설정 dict를 반환합니다. name을 생략하면 ASR_PROFILE 환경 변수(기본 "accurate")를 따릅니다."""
+    name = name or os.environ.get("ASR_PROFILE", DEFAULT_PROFILE)
+    if name not in DECODE_PROFILES:
+        raise ValueError(f"Unknown ASR profile: {name} (available: {', '.join(DECODE_PROFILES)})")
+    return dict(DECODE_PROFILES[name])
+
+
+def _decode_options(profile):
+    """프로필을 Whisper transcribe 인자로 바꿉니다. DTW 단어 정렬은 word_timing이 "dtw"일 때만 실행합니다."""
+    options = {key: value for key, value in profile.items() if key != "word_timing"}
+    options["word_timestamps"] = profile["word_timing"] == "dtw"
+    return options
+
+
+def _batched_options(options):
+    # 배치 경로는 창마다 한 번 디코딩하므로 fallback 단계 중 첫 temperature만 사용합니다.
+    temperature = options["temperature"]
+    if isinstance(temperature, (list, tuple)):
+        temperature = temperature[0]
+    return {"language": options["language"], "beam_size": options["beam_size"],
+            "best_of": options["best_of"] if temperature > 0 else None, "temperature": temperature}
+
+
+def _micro_batching_enabled():
+    return os.environ.get("ASR_MICRO_BATCH", "0") == "1"
+
+
+def _run_transcription(audio, backend, speech_regions, workers, batched=False, options=None):
+    """설정에 맞는 경로로 Whisper를 실행하고 Whisper 결과 형식의 dict를 반환합니다."""
+    options = options if options is not None else _decode_options(get_profile())
+    if speech_regions is not None:
+        samples, timeline = compact_audio(as_audio_context(audio), speech_regions)
+        if batched:
+            result = transcribe_batched(AudioContext(samples), backend, options["word_timestamps"],
+                                        **_batched_options(options))
+        elif workers and workers > 1:
+            result = transcribe_chunked(AudioContext(samples), backend, workers, **options)
+        else:
+            result = backend.transcribe(samples, **options)
+        result = remap_transcription(result, timeline)
+    elif batched:
+        result = transcribe_batched(as_audio_context(audio), backend, options["word_timestamps"],
+                                    **_batched_options(options))
+    elif workers and workers > 1:
+        result = transcribe_chunked(as_audio_context(audio), backend, workers, **options)
+    else:
+        if isinstance(audio, AudioContext):
+            audio = audio.asr_input()
+        result = backend.transcribe(audio, **options)
+    return result
+
+
+def transcribe_audio(audio, backend=None, model_size=DEFAULT_MODEL_SIZE, speech_regions=None, workers=None,
+                     use_cache=True, batched=None, profile=None, rms_frames=None):
+    # audio: 파일 경로, 16kHz float32 ndarray, 또는 AudioContext
+    # AudioContext를 넘기면 Whisper가 ffmpeg로 파일을 다시 디코딩하지 않습니다.
+    # backend: 백엔드 이름("torch", "int8", "speculative") 또는 WhisperBackend 인스턴스
+    # speech_regions: [(start_sec, end_sec), ...] 주어지면 이 구간만 전사하고 (VAD gating)
+    #                 단어 타임스탬프를 원본 타임라인으로 되돌립니다.
+    # workers: 2 이상이면 쉼 경계에서 청크로 나눠 프로세스 풀에서 병렬 전사합니다.
+    # use_cache: 캐시가 설정된 경우(TRANSCRIPT_CACHE_DIR) 같은 오디오/설정의 전사 결과를 재사용합니다.
+    # batched: 30초 창을 공유 배처에 넣어 동시에 실행 중인 다른 작업의 창과 함께 배치 디코딩합니다.
+    #          생략하면 배포 설정(ASR_MICRO_BATCH=1)을 따르며, 켜지면 workers보다 우선합니다.
+    # profile: 디코딩 프로필 이름("accurate", "fast"). 생략하면 ASR_PROFILE 환경 변수를 따릅니다.
+    # rms_frames: 프레임별 RMS (frame 2048, hop 512). "energy" 단어 시각 근사에 사용하며, 없으면 계산합니다.
+    settings = get_profile(profile)
+    options = _decode_options(settings)
+    if batched is None:
+        batched = _micro_batching_enabled()
+    if not isinstance(backend, WhisperBackend):
+        backend = get_backend(backend, model_size)
+    if speech_regions is not None and not speech_regions:
+        return "", 0, WordTable.from_columns([], [], [])
+
+    cache = get_transcript_cache() if use_cache else None
+    if cache is not None:
+        audio = as_audio_context(audio)
+        cache_key = cache.make_key(audio, {
+            "backend": backend.name,
+            "whisper_version": whisper_version(),
+            "model": backend.model_size,
+            "spec": backend.spec(),
+            "speech_regions": speech_regions,
+            "chunked": bool(workers and workers > 1),
+            "batched": bool(batched),
+            "decode_options": settings,
+        })
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    result = _run_transcription(audio, backend, speech_regions, workers, batched, options)
+    if settings["word_timing"] == "energy" and rms_frames is None:
+        rms_frames = as_audio_context(audio).rms(frame_length=2048, hop_length=512)
+    # DTW 정렬을 건너뛴 프로필은 segment 시각(+ RMS 포락선)으로 단어 시각을 근사합니다.
+    add_word_timing(result, settings["word_timing"], rms_frames)
     text = result["text"]
     duration = result["segments"][-1]["end"] if result["segments"] else 0
-    
-    # 단어 타임스탬프 정보 추출
-    word_timestamps = []
-    for segment in result["segments"]:
-        if "words" in segment:
-            for word in segment["words"]:
-                word_timestamps.append({
-                    "word": word["word"],
-                    "start": word["start"],
-                    "end": word["end"]
-                })
-    
-    # 수정된 반환값: 텍스트, 전체 길이, 단어별 타임스탬프
-    return text, duration, word_timestamps
\ No newline at end of file
+
+    # 단어 타임스탬프 정보 추출 (열 단위 WordTable)
+    words = [word for segment in result["segments"] for word in segment.get("words", [])]
+    word_timestamps = WordTable.from_columns([w["word"] for w in words],
+                                             [w["start"] for w in words],
+                                             [w["end"] for w in words])
+
+    if cache is not None:
+        cache.put(cache_key, text, duration, word_timestamps)
+
+    # 수정된 반환값: 텍스트, 전체 길이, 단어별 타임스탬프(WordTable: word dict 목록처럼 반복/인덱싱 가능)
+    return text, duration, word_timestamps
@@ -0,0 +1,204 @@
+# audio_feedback/audio_context.py
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+
+import librosa
+import numpy as np
+from audio_feedback.extract_audio import extract_audio_to_array, extract_audio_from_video
+
+SAMPLE_RATE = 16000
+FRAMES_PER_BLOCK = 2048  # frame_blocks 한 번에 처리하는 프레임 수 (hop 512 기준 약 65초)
+
+
+class AudioContext:
+    """
+    작업(job) 하나에서 공유하는 오디오 버퍼.
+    16kHz mono 신호를 한 번만 디코딩해 float32 배열로 보관하고,
+    각 분석 단계(Whisper, piptrack, RMS, 말더듬 감지)에는 복사 없이 slice(view)를 넘깁니다.
+    """
+
+    def __init__(self, samples, sr=SAMPLE_RATE):
+        """
+        Args:
+            samples (np.ndarray): mono 오디오 신호.
+            sr (int): 샘플링 레이트.
+        """
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.sr = sr
+
+    @classmethod
+    def from_file(cls, audio_path, sr=SAMPLE_RATE):
+        """오디오 파일을 한 번 디코딩해 컨텍스트를 만듭니다."""
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        y, sr = librosa.load(audio_path, sr=sr)
+        return cls(y, sr)
+
+    @classmethod
+    def from_video(cls, video_path):
+        """
+        영상에서 오디오를 ffmpeg 파이프로 바로 메모리에 읽어 컨텍스트를 만듭니다.
+        임시 WAV 파일을 쓰고 다시 읽지 않습니다.
+        """
+        y = extract_audio_to_array(video_path)
+        if y is None:
+            raise RuntimeError(f"Audio extraction failed: {video_path}")
+        return cls(y, SAMPLE_RATE)
+
+    @property
+    def num_samples(self):
+        return len(self.samples)
+
+    @property
+    def duration(self):
+        return self.num_samples / float(self.sr)
+
+    def read(self, start, stop):
+        """
+        샘플 인덱스 [start, stop) 구간을 float32로 반환합니다.
+        신호 범위를 벗어나는 부분은 0으로 채웁니다. (librosa의 center=True, pad_mode='constant'와 동일)
+        """
+        lo, hi = max(start, 0), min(stop, self.num_samples)
+        window = self._read(lo, hi) if hi > lo else np.zeros(0, dtype=np.float32)
+        if lo == start and hi == stop:
+            return window
+        out = np.zeros(stop - start, dtype=np.float32)
+        out[lo - start:lo - start + len(window)] = window
+        return out
+
+    def _read(self, start, stop):
+        return self.samples[start:stop]
+
+    def segment(self, start_time_sec, end_time_sec):
+        """
+        [start, end) 구간의 view를 반환합니다. (librosa.load의 offset/duration과 같은 반올림)
+        """
+        start = max(0, int(np.round(start_time_sec * self.sr)))
+        length = max(0, int(np.round((end_time_sec - start_time_sec) * self.sr)))
+        return self._read(start, min(start + length, self.num_samples))
+
+    def num_frames(self, hop_length=512):
+        """center=True 프레이밍 기준 전체 프레임 수"""
+        return 1 + self.num_samples // hop_length
+
+    def frame_blocks(self, frame_length=2048, hop_length=512, frames_per_block=FRAMES_PER_BLOCK):
+        """
+        전체 신호를 프레임 경계에 맞춘 블록으로 나눠 (첫 프레임 인덱스, 블록 신호)를 yield합니다.
+        블록 신호에 center=False로 프레이밍하면 전체 신호에 center=True로 프레이밍한 결과와
+        같은 프레임이 나옵니다. (인접 블록은 frame_length - hop_length 만큼 겹칩니다)
+        """
+        total = self.num_frames(hop_length)
+        half = frame_length // 2
+        for first in range(0, total, frames_per_block):
+            count = min(frames_per_block, total - first)
+            start = first * hop_length - half
+            stop = (first + count - 1) * hop_length + frame_length - half
+            yield first, self.read(start, stop)
+
+    def rms(self, frame_length=2048, hop_length=512):
+        """librosa.feature.rms(y, frame_length, hop_length)[0]과 같은 프레임별 RMS"""
+        return librosa.feature.rms(y=self.samples, frame_length=frame_length, hop_length=hop_length)[0]
+
+    def asr_input(self):
+        """Whisper에 그대로 넘길 수 있는 입력(float32 ndarray)을 반환합니다."""
+        return self.samples
+
+    def close(self):
+        pass
+
+
+def _find_wav_data_chunk(wav_path):
+    """RIFF 헤더를 훑어 PCM data 청크의 (바이트 오프셋, 샘플 수)를 반환합니다."""
+    with open(wav_path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f"Not a WAV file: {wav_path}")
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"No data chunk in WAV file: {wav_path}")
+            chunk_id, size = struct.unpack('<4sI', header)
+            if chunk_id == b'data':
+                offset = f.tell()
+                # 스트리밍으로 쓴 WAV는 data 크기가 비어 있을 수 있어 파일 크기로 보정합니다.
+                available = os.path.getsize(wav_path) - offset
+                if size == 0 or size > available:
+                    size = available
+                return offset, size // 2
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+class MappedAudioContext(AudioContext):
+    """
+    긴 녹음용 AudioContext.
+    추출한 16-bit PCM WAV를 디스크에 둔 채 memory-map으로 열고,
+    요청한 구간만 그때그때 float32로 변환합니다. 녹음 길이와 관계없이 최대 메모리가 일정합니다.
+    """
+
+    def __init__(self, wav_path, sr=SAMPLE_RATE, cleanup_dir=None):
+        """
+        Args:
+            wav_path (str): 16kHz mono pcm_s16le WAV 경로.
+            sr (int): 샘플링 레이트.
+            cleanup_dir (str, optional): close() 때 함께 지울 임시 디렉터리.
+        """
+        offset, num_samples = _find_wav_data_chunk(wav_path)
+        self.path = wav_path
+        self.sr = sr
+        self._pcm = np.memmap(wav_path, dtype='<i2', mode='r', offset=offset, shape=(num_samples,))
+        self._cleanup = weakref.finalize(self, shutil.rmtree, cleanup_dir, True) if cleanup_dir else None
+
+    @classmethod
+    def from_video(cls, video_path):
+        """영상에서 PCM WAV를 임시 디렉터리에 추출하고 memory-map으로 엽니다."""
+        tmpdir = tempfile.mkdtemp(prefix="audio_mmap_")
+        wav_path = os.path.join(tmpdir, "audio.wav")
+        if extract_audio_from_video(video_path, wav_path) is None:
+            shutil.rmtree(tmpdir, True)
+            raise RuntimeError(f"Audio extraction failed: {video_path}")
+        return cls(wav_path, SAMPLE_RATE, cleanup_dir=tmpdir)
+
+    @property
+    def num_samples(self):
+        return len(self._pcm)
+
+    @property
+    def samples(self):
+        """전체 신호를 float32로 변환합니다. 메모리가 녹음 길이에 비례하므로 가능하면 read()/segment()를 쓰세요."""
+        return self._read(0, self.num_samples)
+
+    def _read(self, start, stop):
+        # librosa.load(sr=16000)로 s16 WAV를 읽었을 때와 같은 스케일
+        return self._pcm[start:stop].astype(np.float32) / 32768.0
+
+    def rms(self, frame_length=2048, hop_length=512):
+        """블록 단위로 계산해 전체 신호를 메모리에 올리지 않습니다."""
+        parts = [
+            librosa.feature.rms(y=block, frame_length=frame_length, hop_length=hop_length, center=False)[0]
+            for _, block in self.frame_blocks(frame_length, hop_length)
+        ]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    def asr_input(self):
+        # Whisper는 경로를 받으면 ffmpeg로 직접 디코딩하므로 전체 float 배열을 여기서 만들지 않습니다.
+        return self.path
+
+    def close(self):
+        self._pcm = None
+        if self._cleanup is not None:
+            self._cleanup()
+
+
+def as_audio_context(audio):
+    """
+    경로, 16kHz mono ndarray 또는 AudioContext를 받아 AudioContext를 반환합니다.
+    기존처럼 경로를 넘기는 호출부도 그대로 동작하도록 하기 위한 헬퍼입니다.
+    """
+    if isinstance(audio, AudioContext):
+        return audio
+    if isinstance(audio, np.ndarray):
+        return AudioContext(audio)
+    return AudioContext.from_file(audio)
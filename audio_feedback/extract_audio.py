@@ -1,6 +1,12 @@
 # audio_feedback/extract_audio.py
 import os
+import threading
 import ffmpeg
+import numpy as np
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # pcm_s16le
+
 
 def extract_audio_from_video(video_path, output_audio_path):
     try:
@@ -14,4 +20,104 @@ def extract_audio_from_video(video_path, output_audio_path):
         return output_audio_path
     except ffmpeg.Error as e:
         print("FFmpeg error:", e)
-        return None
\ No newline at end of file
+        return None
+
+
+def _open_pcm_stream(video_path):
+    """
+    ffmpeg가 16kHz mono pcm_s16le를 stdout으로 내보내도록 실행합니다.
+    stderr는 별도 스레드에서 비워 파이프가 가득 차서 멈추는 일이 없도록 합니다.
+    """
+    process = (
+        ffmpeg
+        .input(video_path)
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=str(SAMPLE_RATE))
+        .global_args('-loglevel', 'error')
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    stderr_chunks = []
+    drain = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    drain.start()
+    return process, drain, stderr_chunks
+
+
+def _finish_pcm_stream(process, drain, stderr_chunks, check=True):
+    if not check:
+        # 소비자가 중간에 멈춘 경우: 남은 디코딩은 버립니다.
+        process.kill()
+    process.stdout.close()
+    process.wait()
+    drain.join()
+    if check and process.returncode != 0:
+        raise ffmpeg.Error('ffmpeg', None, b"".join(stderr_chunks))
+
+
+def _estimate_num_samples(video_path):
+    """ffprobe의 길이 정보로 버퍼 크기를 추정합니다. 알 수 없거나 ffprobe를 실행할 수 없으면 0."""
+    try:
+        duration = float(ffmpeg.probe(video_path)['format']['duration'])
+    except (ffmpeg.Error, OSError, KeyError, ValueError, TypeError):
+        return 0
+    return int(np.ceil(duration * SAMPLE_RATE))
+
+
+def extract_audio_to_array(video_path):
+    """
+    임시 WAV 파일 없이 ffmpeg stdout을 미리 할당한 버퍼로 바로 읽어
+    16kHz mono float32 배열을 반환합니다. 실패하면 None을 반환합니다.
+    """
+    if not os.path.exists(video_path):
+        print("FFmpeg error:", f"Video file not found: {video_path}")
+        return None
+
+    # 컨테이너 길이가 실제 오디오보다 짧게 기록된 경우를 대비해 1초 여유를 둡니다.
+    buffer = np.empty(_estimate_num_samples(video_path) + SAMPLE_RATE, dtype=np.int16)
+    filled = 0
+    try:
+        process, drain, stderr_chunks = _open_pcm_stream(video_path)
+        try:
+            while True:
+                if filled == len(buffer):
+                    buffer = np.concatenate([buffer, np.empty(max(len(buffer), SAMPLE_RATE * 60), dtype=np.int16)])
+                view = memoryview(buffer[filled:]).cast('B')
+                n = process.stdout.readinto(view)
+                if not n:
+                    break
+                # s16le 샘플 경계에 맞지 않게 읽힌 경우 나머지 바이트를 마저 읽습니다.
+                while n % BYTES_PER_SAMPLE:
+                    extra = process.stdout.readinto(view[n:n + 1])
+                    if not extra:
+                        break
+                    n += extra
+                filled += n // BYTES_PER_SAMPLE
+        finally:
+            _finish_pcm_stream(process, drain, stderr_chunks)
+    except ffmpeg.Error as e:
+        print("FFmpeg error:", e)
+        return None
+
+    # librosa.load(sr=16000)로 s16 WAV를 읽었을 때와 같은 스케일
+    return buffer[:filled].astype(np.float32) / 32768.0
+
+
+def iter_audio_chunks(video_path, chunk_samples=SAMPLE_RATE * 10):
+    """
+    ffmpeg stdout을 chunk_samples 크기의 float32 블록으로 나눠 yield합니다.
+    마지막 블록만 chunk_samples보다 짧을 수 있습니다.
+    실패하면 ffmpeg.Error를 발생시킵니다.
+    """
+    chunk_bytes = chunk_samples * BYTES_PER_SAMPLE
+    process, drain, stderr_chunks = _open_pcm_stream(video_path)
+    completed = False
+    try:
+        while True:
+            raw = process.stdout.read(chunk_bytes)
+            if not raw:
+                break
+            usable = len(raw) - len(raw) % BYTES_PER_SAMPLE
+            yield np.frombuffer(raw[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+            if len(raw) < chunk_bytes:
+                break
+        completed = True
+    finally:
+        _finish_pcm_stream(process, drain, stderr_chunks, check=completed)
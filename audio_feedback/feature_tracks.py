@@ -0,0 +1,127 @@
+# audio_feedback/feature_tracks.py
+import math
+
+import numpy as np
+
+from audio_feedback.word_table import as_word_table
+
+
+def _prefix_sum(values, dtype=np.float64):
+    return np.concatenate([np.zeros(1, dtype=dtype), np.cumsum(values, dtype=dtype)])
+
+
+class FeatureTracks:
+    """
+    프레임별 RMS, f0, 유성 여부와 단어 시작 시각의 누적합을 한 번 만들어 두고
+    임의의 [start, end) 구간의 평균/개수/비율을 상수 시간에 계산합니다.
+    (단어 수는 정렬된 시작 시각에서 이분 탐색으로 구간 경계를 찾습니다)
+    구간 길이(15초, 45초, 문장 단위 등)를 바꿔도 오디오를 다시 분석하지 않습니다.
+    """
+
+    def __init__(self, rms_frames, pitch_track, word_timestamps, num_samples, sr=16000, hop_length=512):
+        self.sr = sr
+        self.hop_length = hop_length
+        self.num_samples = num_samples
+        self._rms_sum = _prefix_sum(np.asarray(rms_frames, dtype=np.float64))
+        voiced = pitch_track.voiced
+        self._voiced_count = _prefix_sum(voiced, dtype=np.int64)
+        self._f0_sum = _prefix_sum(np.where(voiced, pitch_track.f0, 0.0))
+
+        table = as_word_table(word_timestamps)
+        order = np.argsort(table.starts, kind='stable')
+        self._word_starts = table.starts[order]
+        # calculate_speaking_rate와 같은 단어 수: 공백으로 나눈 토큰 수 (고유 문자열마다 한 번 계산)
+        tokens_per_string = np.array([len(word.split()) for word in table.strings], dtype=np.int64)
+        self._word_tokens = _prefix_sum(tokens_per_string[table.codes[order]] if len(order) else [], dtype=np.int64)
+
+    @classmethod
+    def from_features(cls, features, num_samples, sr=16000, hop_length=512):
+        """analyze_audio_features 결과로 트랙을 만듭니다."""
+        return cls(features['rms_frames'], features['pitch_track'], features['word_timestamps'],
+                   num_samples, sr, hop_length)
+
+    def _frame_range(self, total, start_sec, end_sec):
+        """중심 시각(t * hop / sr)이 [start_sec, end_sec)에 드는 프레임의 [first, last)"""
+        frames_per_sec = self.sr / float(self.hop_length)
+        first = min(total, max(0, int(math.ceil(start_sec * frames_per_sec))))
+        last = min(total, max(first, int(math.ceil(end_sec * frames_per_sec))))
+        return first, last
+
+    def duration(self, start_sec, end_sec):
+        """AudioContext.segment(start, end)로 자른 구간의 길이(초)"""
+        start = max(0, int(np.round(start_sec * self.sr)))
+        length = max(0, int(np.round((end_sec - start_sec) * self.sr)))
+        return max(0, min(start + length, self.num_samples) - start) / float(self.sr)
+
+    def mean_rms(self, start_sec, end_sec):
+        first, last = self._frame_range(len(self._rms_sum) - 1, start_sec, end_sec)
+        if last == first:
+            return 0.0
+        return float((self._rms_sum[last] - self._rms_sum[first]) / (last - first))
+
+    def voiced_count(self, start_sec, end_sec):
+        first, last = self._frame_range(len(self._voiced_count) - 1, start_sec, end_sec)
+        return int(self._voiced_count[last] - self._voiced_count[first])
+
+    def voiced_ratio(self, start_sec, end_sec):
+        first, last = self._frame_range(len(self._voiced_count) - 1, start_sec, end_sec)
+        if last == first:
+            return 0.0
+        return float(self._voiced_count[last] - self._voiced_count[first]) / (last - first)
+
+    def mean_pitch(self, start_sec, end_sec):
+        """유성 프레임 평균 f0 (Hz). 유성 프레임이 없으면 0"""
+        first, last = self._frame_range(len(self._f0_sum) - 1, start_sec, end_sec)
+        count = self._voiced_count[last] - self._voiced_count[first]
+        if count == 0:
+            return 0
+        return float((self._f0_sum[last] - self._f0_sum[first]) / count)
+
+    def word_count(self, start_sec, end_sec):
+        """start_sec <= 단어 시작 < end_sec 인 단어 수"""
+        first = int(np.searchsorted(self._word_starts, start_sec, side='left'))
+        last = int(np.searchsorted(self._word_starts, end_sec, side='left'))
+        return int(self._word_tokens[max(first, last)] - self._word_tokens[first])
+
+    def speaking_rate(self, start_sec, end_sec):
+        """분당 단어 수 (calculate_speaking_rate와 같은 값)"""
+        duration = self.duration(start_sec, end_sec)
+        if duration <= 0:
+            return 0.0
+        return self.word_count(start_sec, end_sec) / duration * 60
+
+    def window(self, start_sec, end_sec):
+        """analyze_audio_segment와 같은 키에 구간 평균 RMS와 유성 비율을 더한 dict"""
+        return {
+            "start_time_sec": start_sec,
+            "end_time_sec": end_sec,
+            "speaking_rate_wpm": self.speaking_rate(start_sec, end_sec),
+            "avg_pitch_hz": self.mean_pitch(start_sec, end_sec),
+            "avg_rms": self.mean_rms(start_sec, end_sec),
+            "voiced_ratio": self.voiced_ratio(start_sec, end_sec),
+        }
+
+    def fixed_windows(self, segment_sec, total_duration):
+        """amain의 구간 루프와 같은 경계: 0부터 segment_sec 간격, 마지막 구간은 전체 길이에서 끝"""
+        windows = []
+        start = 0
+        while start < int(total_duration):
+            end = min(start + segment_sec, total_duration)
+            if end - start > 0:
+                windows.append(self.window(start, end))
+            start += segment_sec
+        return windows
+
+    def sentence_windows(self, sentences):
+        """문장(analyze_audio_features의 "sentences")마다 구간 통계를 계산합니다. (문장 텍스트는 "text", 번호는 "sentence_id")"""
+        windows = []
+        for sentence in sentences:
+            windows.append(dict(self.window(sentence['start'], sentence['end']), text=sentence['text'],
+                                sentence_id=sentence.get('id')))
+        return windows
+
+    def windows(self, segment_sec, total_duration, sentences=None):
+        """segment_sec: 초 단위 길이 또는 "sentence" """
+        if segment_sec == "sentence":
+            return self.sentence_windows(sentences or [])
+        return self.fixed_windows(segment_sec, total_duration)
@@ -0,0 +1,75 @@
+# audio_feedback/interval_index.py
+import bisect
+
+from audio_feedback.word_table import as_word_table
+
+
+def _is_sorted(values):
+    return all(a <= b for a, b in zip(values, values[1:]))
+
+
+class TimestampIndex:
+    """
+    단어/문장 타임스탬프의 시작/끝 시각 배열을 만들어 두고 bisect로 구간 질의를 처리하는 인덱스.
+    작업(job)마다 한 번 만들어 말더듬 구간마다 단어와 문장을 찾는 데 씁니다.
+    결과는 get_stutter_words_at_timestamp / 문장 선형 탐색 / find_full_sentence와 같습니다.
+    (시각이 정렬되어 있지 않은 입력이면 같은 결과를 위해 선형 탐색으로 처리합니다)
+    """
+
+    def __init__(self, word_timestamps, sentences, transcript=""):
+        self.words = as_word_table(word_timestamps)
+        self.sentences = sentences
+        self.transcript = transcript
+        self._word_starts = self.words.starts.tolist()
+        self._words_sorted = self.words.is_sorted()
+
+        self._sentence_starts = [s['start'] for s in sentences]
+        self._sentence_ends = [s['end'] for s in sentences]
+        self._sentences_sorted = _is_sorted(self._sentence_starts) and _is_sorted(self._sentence_ends)
+        # find_full_sentence가 호출마다 하던 전사문 분리를 한 번만 합니다.
+        self._transcript_sentences = transcript.split('.') if isinstance(transcript, str) else None
+        self._full_sentences = {}
+
+    def words_in(self, start, end):
+        """start <= 단어 시작, 단어 끝 <= end 인 단어들을 공백으로 이어 붙인 문자열"""
+        words = self.words
+        if self._words_sorted:
+            # 단어 끝 >= 시작이므로 끝 <= end 인 단어는 시작도 end 이하입니다.
+            lo = bisect.bisect_left(self._word_starts, start)
+            hi = bisect.bisect_right(self._word_starts, end)
+            words = words[lo:hi]
+        inside = (words.starts >= start) & (words.ends <= end)
+        return " ".join(words.strings[code] for code in words.codes[inside].tolist())
+
+    def sentence_containing(self, start, end):
+        """[start, end]를 포함하는 첫 문장의 텍스트. 없으면 빈 문자열"""
+        if not self._sentences_sorted:
+            for sentence in self.sentences:
+                if start >= sentence['start'] and end <= sentence['end']:
+                    return sentence['text']
+            return ""
+        # 시작/끝이 모두 정렬되어 있으면 조건을 만족하는 문장은 연속 구간 [first, last]입니다.
+        last = bisect.bisect_right(self._sentence_starts, start) - 1
+        first = bisect.bisect_left(self._sentence_ends, end)
+        if first <= last:
+            return self.sentences[first]['text']
+        return ""
+
+    def full_sentence(self, stutter_words):
+        """find_full_sentence와 같은 결과 (같은 단어열은 한 번만 계산)"""
+        if stutter_words not in self._full_sentences:
+            result = stutter_words
+            for sentence in self._transcript_sentences or []:
+                if stutter_words.strip() in sentence:
+                    result = sentence.strip() + '.'
+                    break
+            self._full_sentences[stutter_words] = result
+        return self._full_sentences[stutter_words]
+
+    def attribute(self, timestamp):
+        """말더듬 구간 하나의 (말더듬 단어, 소속 문장)"""
+        stutter_words = self.words_in(timestamp['start'], timestamp['end'])
+        sentence = self.sentence_containing(timestamp['start'], timestamp['end'])
+        if not sentence:
+            sentence = self.full_sentence(stutter_words)
+        return stutter_words, sentence
@@ -0,0 +1,105 @@
+# audio_feedback/pitch_tracker.py
+import math
+
+import numpy as np
+
+from audio_feedback.vad import SILENCE_THRESHOLD
+
+F0_MIN = 65.0   # 성인 발화 기본 주파수 탐색 범위 (Hz)
+F0_MAX = 400.0
+YIN_FRAME_LENGTH = 1024
+TROUGH_THRESHOLD = 0.15
+
+
+def yin_frames(frames, sr=16000, fmin=F0_MIN, fmax=F0_MAX, trough_threshold=TROUGH_THRESHOLD,
+               silence_threshold=SILENCE_THRESHOLD):
+    """
+    프레임 행렬 (frame_length, n_frames)에 YIN을 한 번에 적용합니다.
+    차분 함수는 FFT 자기상관과 에너지 누적합으로 모든 프레임/지연값을 벡터 연산으로 계산합니다.
+    Returns:
+        (f0, voiced): 프레임별 f0(Hz, 무성 프레임은 0)와 유성 여부
+    """
+    x = np.ascontiguousarray(frames.T, dtype=np.float64)
+    n_frames, length = x.shape
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=bool)
+    tau_min = max(1, int(math.floor(sr / fmax)))
+    tau_max = min(length - 2, int(math.ceil(sr / fmin)))
+    window = length - tau_max
+
+    # r[tau] = sum_j x[j] * x[j + tau]  (j < window)
+    n_fft = 1 << int(math.ceil(math.log2(length + window)))
+    acf = np.fft.irfft(np.fft.rfft(x, n_fft) * np.conj(np.fft.rfft(x[:, :window], n_fft)), n_fft)[:, :tau_max + 1]
+    energy = np.concatenate([np.zeros((n_frames, 1)), np.cumsum(x ** 2, axis=1)], axis=1)
+    taus = np.arange(tau_max + 1)
+    diff = energy[:, [window]] + energy[:, taus + window] - energy[:, taus] - 2 * acf
+    diff = np.maximum(diff, 0.0)
+
+    # 누적 평균 정규화 차분 (cmnd)
+    cmnd = np.ones_like(diff)
+    cumulative = np.cumsum(diff[:, 1:], axis=1)
+    cmnd[:, 1:] = diff[:, 1:] * taus[1:] / np.maximum(cumulative, np.finfo(np.float64).tiny)
+
+    search = cmnd[:, tau_min:tau_max + 1]
+    middle = search[:, 1:-1]
+    troughs = (middle < search[:, :-2]) & (middle <= search[:, 2:]) & (middle < trough_threshold)
+    has_trough = troughs.any(axis=1)
+    index = np.where(has_trough, np.argmax(troughs, axis=1) + 1, np.argmin(search, axis=1))
+
+    # 포물선 보간으로 지연값을 샘플 이하 단위로 보정
+    rows = np.arange(n_frames)
+    left = search[rows, np.maximum(index - 1, 0)]
+    center = search[rows, index]
+    right = search[rows, np.minimum(index + 1, search.shape[1] - 1)]
+    denominator = left - 2 * center + right
+    shift = np.where(np.abs(denominator) > 0, (left - right) / (2 * np.where(denominator == 0, 1, denominator)), 0.0)
+    tau = tau_min + index + np.clip(shift, -1.0, 1.0)
+
+    frame_rms = np.sqrt(energy[:, -1] / length)
+    voiced = has_trough & (frame_rms >= silence_threshold)
+    f0 = np.where(voiced, sr / tau, 0.0).astype(np.float32)
+    return f0, voiced
+
+
+class PitchTrack:
+    """
+    파일 전체의 프레임별 f0와 유성 마스크. 프레임 t의 중심 시각은 t * hop_length / sr 입니다.
+    구간 통계는 트랙을 잘라 계산하므로 피치를 다시 추정하지 않습니다.
+    """
+
+    def __init__(self, f0, voiced, sr=16000, hop_length=512):
+        self.f0 = f0
+        self.voiced = voiced
+        self.sr = sr
+        self.hop_length = hop_length
+
+    def frame_range(self, start_sec=None, end_sec=None):
+        """중심 시각이 [start_sec, end_sec)에 드는 프레임의 [first, last)"""
+        frames_per_sec = self.sr / float(self.hop_length)
+        first = 0 if start_sec is None else max(0, int(math.ceil(start_sec * frames_per_sec)))
+        last = len(self.f0) if end_sec is None else min(len(self.f0), int(math.ceil(end_sec * frames_per_sec)))
+        return first, max(first, last)
+
+    def mean(self, start_sec=None, end_sec=None):
+        """구간의 유성 프레임 평균 f0 (Hz). 유성 프레임이 없으면 0"""
+        first, last = self.frame_range(start_sec, end_sec)
+        values = self.f0[first:last][self.voiced[first:last]]
+        return float(np.mean(values)) if len(values) > 0 else 0
+
+
+def track_pitch(audio, hop_length=512, frame_length=YIN_FRAME_LENGTH, fmin=F0_MIN, fmax=F0_MAX):
+    """
+    AudioContext 전체에 대해 PitchTrack을 한 번 계산합니다.
+    프레임 경계에 맞춘 블록 단위로 처리하므로 memory-map 컨텍스트도 블록 하나 분량의 메모리만 사용합니다.
+    """
+    import librosa
+
+    f0_parts, voiced_parts = [], []
+    for _, block in audio.frame_blocks(frame_length, hop_length):
+        frames = librosa.util.frame(block, frame_length=frame_length, hop_length=hop_length)
+        f0, voiced = yin_frames(frames, audio.sr, fmin, fmax)
+        f0_parts.append(f0)
+        voiced_parts.append(voiced)
+    if not f0_parts:
+        return PitchTrack(np.zeros(0, dtype=np.float32), np.zeros(0, dtype=bool), audio.sr, hop_length)
+    return PitchTrack(np.concatenate(f0_parts), np.concatenate(voiced_parts), audio.sr, hop_length)
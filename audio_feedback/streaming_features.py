@@ -0,0 +1,164 @@
+# audio_feedback/streaming_features.py
+import librosa
+import numpy as np
+
+from audio_feedback.pitch_tracker import YIN_FRAME_LENGTH, yin_frames
+
+SAMPLE_RATE = 16000
+
+
+class FrameBlocker:
+    """
+    임의 크기의 오디오 chunk를 받아 프레임 경계에 맞춘 블록으로 다시 묶습니다.
+    앞뒤에 frame_length // 2 만큼 0을 채우므로 librosa의 center=True, pad_mode='constant' 프레이밍과
+    같은 프레임이 나오며, 인접 블록은 frame_length - hop_length 만큼 겹칩니다.
+    """
+
+    def __init__(self, frame_length=2048, hop_length=512):
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self._buffer = np.zeros(frame_length // 2, dtype=np.float32)
+        self._next_frame = 0
+
+    def feed(self, chunk):
+        """chunk를 추가하고 완성된 (첫 프레임 인덱스, 블록) 목록을 반환합니다."""
+        self._buffer = np.concatenate([self._buffer, np.asarray(chunk, dtype=np.float32)])
+        return self._drain()
+
+    def finish(self):
+        """오른쪽 패딩을 붙이고 남은 프레임을 모두 내보냅니다."""
+        self._buffer = np.concatenate([self._buffer, np.zeros(self.frame_length // 2, dtype=np.float32)])
+        return self._drain()
+
+    def _drain(self):
+        if len(self._buffer) < self.frame_length:
+            return []
+        count = (len(self._buffer) - self.frame_length) // self.hop_length + 1
+        block = self._buffer[:(count - 1) * self.hop_length + self.frame_length]
+        first = self._next_frame
+        self._next_frame += count
+        self._buffer = self._buffer[count * self.hop_length:]
+        return [(first, block)]
+
+
+class SilenceRunTracker:
+    """
+    프레임별 RMS가 threshold 미만인 구간(무음/멈칫거림)을 점진적으로 찾습니다.
+    stuttering_detector.detect_stuttering과 같은 규칙(끝 프레임 = 마지막 무음 프레임,
+    min_duration 초과만 기록, 끝까지 이어지면 전체 길이에서 종료)을 따릅니다.
+    """
+
+    def __init__(self, threshold=0.008, sr=SAMPLE_RATE, hop_length=512, min_duration=0.1):
+        self.threshold = threshold
+        self.sr = sr
+        self.hop_length = hop_length
+        self.min_duration = min_duration
+        self._run_start = None
+
+    def _frame_time(self, frame):
+        return frame * self.hop_length / float(self.sr)
+
+    def update(self, first_frame, rms):
+        """새 RMS 프레임을 반영하고 이번에 닫힌 구간 목록을 반환합니다."""
+        closed = []
+        silent = rms < self.threshold
+        # 상태가 바뀌는 프레임만 골라 파이썬 루프를 최소화합니다.
+        prev = np.concatenate([[self._run_start is not None], silent[:-1]])
+        for i in np.flatnonzero(silent != prev):
+            frame = first_frame + int(i)
+            if silent[i]:
+                self._run_start = frame
+            else:
+                start_time = self._frame_time(self._run_start)
+                end_time = self._frame_time(frame - 1)
+                if end_time - start_time > self.min_duration:
+                    closed.append({"start": start_time, "end": end_time})
+                self._run_start = None
+        return closed
+
+    def finish(self, duration_sec):
+        if self._run_start is None:
+            return []
+        start_time = self._frame_time(self._run_start)
+        self._run_start = None
+        if duration_sec - start_time > self.min_duration:
+            return [{"start": start_time, "end": duration_sec}]
+        return []
+
+
+class StreamingFeatureExtractor:
+    """
+    오디오를 고정 크기 블록으로 받아 RMS 프레임, 프레임별 f0(YIN), 무음 구간을
+    들어오는 대로 계산합니다. 최종 rms_frames와 avg_pitch_hz는 analyze_audio_features의
+    일괄 계산 결과와 같습니다. 원본 신호는 블록 하나 분량만 메모리에 유지합니다.
+    """
+
+    def __init__(self, sr=SAMPLE_RATE, frame_length=2048, hop_length=512,
+                 silence_threshold=0.008, min_silence_sec=0.1):
+        self.sr = sr
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self._blocker = FrameBlocker(frame_length, hop_length)
+        self._voiced_f0 = []
+        self._silence = SilenceRunTracker(silence_threshold, sr, hop_length, min_silence_sec)
+        self._rms_parts = []
+        self._silence_runs = []
+        self._num_samples = 0
+
+    def feed(self, chunk):
+        """chunk를 처리하고 이번에 계산된 결과(블록별 dict) 목록을 반환합니다."""
+        self._num_samples += len(chunk)
+        return [self._process(first, block) for first, block in self._blocker.feed(chunk)]
+
+    def finish(self):
+        """스트림 끝: 남은 프레임과 끝까지 이어진 무음 구간을 처리합니다."""
+        updates = [self._process(first, block) for first, block in self._blocker.finish()]
+        closed = self._silence.finish(self.duration)
+        self._silence_runs.extend(closed)
+        if closed:
+            updates.append({"first_frame": self._blocker._next_frame, "rms": np.zeros(0, dtype=np.float32),
+                            "pitch": np.zeros(0, dtype=np.float32), "silences": closed})
+        return updates
+
+    def _process(self, first_frame, block):
+        rms = librosa.feature.rms(y=block, frame_length=self.frame_length,
+                                  hop_length=self.hop_length, center=False)[0]
+        # pitch_tracker.track_pitch와 같은 프레임: 각 RMS 프레임의 가운데 YIN_FRAME_LENGTH 샘플
+        frames = librosa.util.frame(block, frame_length=self.frame_length, hop_length=self.hop_length)
+        offset = (self.frame_length - YIN_FRAME_LENGTH) // 2
+        frame_pitch, voiced = yin_frames(frames[offset:offset + YIN_FRAME_LENGTH], self.sr)
+        self._voiced_f0.append(frame_pitch[voiced])
+        closed = self._silence.update(first_frame, rms)
+        self._rms_parts.append(rms)
+        self._silence_runs.extend(closed)
+        return {"first_frame": first_frame, "rms": rms, "pitch": frame_pitch, "silences": closed}
+
+    @property
+    def duration(self):
+        return self._num_samples / float(self.sr)
+
+    def summary(self):
+        rms_frames = np.concatenate(self._rms_parts) if self._rms_parts else np.zeros(0, dtype=np.float32)
+        voiced_f0 = np.concatenate(self._voiced_f0) if self._voiced_f0 else np.zeros(0, dtype=np.float32)
+        return {
+            "duration_sec": self.duration,
+            "avg_pitch_hz": float(np.mean(voiced_f0)) if len(voiced_f0) > 0 else 0,
+            "avg_rms": np.mean(rms_frames) if len(rms_frames) > 0 else 0.0,
+            "rms_frames": rms_frames,
+            "silence_runs": list(self._silence_runs),
+        }
+
+
+def stream_audio_features(chunks, **kwargs):
+    """
+    오디오 chunk 이터러블(예: extract_audio.iter_audio_chunks)을 소비하면서
+    블록별 결과 dict({"first_frame", "rms", "pitch", "silences"})를 yield합니다.
+    스트림이 끝나면 마지막으로 {"summary": ...}를 yield합니다.
+    """
+    extractor = StreamingFeatureExtractor(**kwargs)
+    for chunk in chunks:
+        for update in extractor.feed(chunk):
+            yield update
+    for update in extractor.finish():
+        yield update
+    yield {"summary": extractor.summary()}
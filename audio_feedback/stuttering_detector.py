@@ -1,58 +1,84 @@
 import librosa
 import numpy as np
+from audio_feedback.audio_context import as_audio_context
 
-def detect_stuttering(audio_path, frame_length=2048, hop_length=512, threshold=0.008):
+def find_low_energy_runs(energy, sr, hop_length, thresholds, duration_sec, min_duration=0.1):
+    """
+    프레임별 RMS가 각 threshold 미만인 구간을 run-length encoding으로 한 번에 찾습니다.
+    끝 시각은 마지막 저에너지 프레임의 시각이고, 끝까지 이어진 구간은 duration_sec에서 끝납니다.
+    min_duration보다 긴 구간만 남깁니다.
+    Returns:
+        threshold 순서대로 [{"start", "end"}, ...] 목록의 리스트
+    """
+    energy = np.asarray(energy)
+    thresholds = np.asarray(thresholds, dtype=np.float64).reshape(-1)
+    num_frames = len(energy)
+    # (threshold 수, 프레임 수 + 1) 경계 행렬: 1 = run 시작, -1 = run 끝 다음 프레임
+    low = (energy[np.newaxis, :] < thresholds[:, np.newaxis]).astype(np.int8)
+    padding = np.zeros((len(thresholds), 1), dtype=np.int8)
+    edges = np.diff(np.concatenate([padding, low, padding], axis=1), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    start_times = librosa.frames_to_time(starts, sr=sr, hop_length=hop_length)
+    end_times = librosa.frames_to_time(ends - 1, sr=sr, hop_length=hop_length)
+    trailing = ends == num_frames
+    keep = np.where(trailing, duration_sec - start_times, end_times - start_times) > min_duration
+
+    runs = [[] for _ in thresholds]
+    for row, start_time, end_time, is_trailing in zip(rows[keep], start_times[keep], end_times[keep], trailing[keep]):
+        runs[row].append({"start": start_time, "end": duration_sec if is_trailing else end_time})
+    return runs
+
+
+def _stuttering_result(stuttering_timestamps, duration_seconds):
+    count = len(stuttering_timestamps)
+    return {
+        "stutter_count": count,
+        "stuttering_timestamps": stuttering_timestamps,
+        "stuttering_feedback": get_stuttering_feedback(count, duration_seconds)
+    }
+
+
+def _load_for_stuttering(audio):
+    """AudioContext를 반환하거나, 실패하면 (None, 오류 결과)를 반환합니다."""
     try:
-        y, sr = librosa.load(audio_path, sr=16000)
+        return as_audio_context(audio), None
     except FileNotFoundError:
-        return {
+        return None, {
             "stutter_count": 0,
             "stuttering_timestamps": [],
             "stuttering_feedback": "오디오 파일을 찾을 수 없어 말더듬 분석을 수행할 수 없습니다."
         }
     except Exception as e:
-        return {
+        return None, {
             "stutter_count": 0,
             "stuttering_timestamps": [],
             "stuttering_feedback": f"오디오 처리 중 오류 발생: {e}"
         }
 
-    energy = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
-    stutter_frames = energy < threshold
-    
-    stuttering_timestamps = []
-    in_stutter = False
-    stutter_start_frame = -1
-    
-    for i in range(len(stutter_frames)):
-        if stutter_frames[i] and not in_stutter:
-            in_stutter = True
-            stutter_start_frame = i
-        elif not stutter_frames[i] and in_stutter:
-            in_stutter = False
-            stutter_end_frame = i - 1
-            
-            start_time = librosa.frames_to_time(stutter_start_frame, sr=sr, hop_length=hop_length)
-            end_time = librosa.frames_to_time(stutter_end_frame, sr=sr, hop_length=hop_length)
-            
-            if end_time - start_time > 0.1:
-                stuttering_timestamps.append({"start": start_time, "end": end_time})
-
-    if in_stutter:
-        start_time = librosa.frames_to_time(stutter_start_frame, sr=sr, hop_length=hop_length)
-        end_time = librosa.get_duration(y=y, sr=sr)
-        if end_time - start_time > 0.1:
-            stuttering_timestamps.append({"start": start_time, "end": end_time})
-    
-    count = len(stuttering_timestamps)
-    duration_seconds = librosa.get_duration(y=y, sr=sr)
-    stuttering_feedback_message = get_stuttering_feedback(count, duration_seconds)
 
-    return {
-        "stutter_count": count,
-        "stuttering_timestamps": stuttering_timestamps,
-        "stuttering_feedback": stuttering_feedback_message
-    }
+def detect_stuttering(audio, frame_length=2048, hop_length=512, threshold=0.008, rms_frames=None):
+    # audio: 오디오 파일 경로 또는 AudioContext
+    # rms_frames: analyze_audio_features에서 같은 frame/hop으로 계산한 RMS. 주면 다시 계산하지 않습니다.
+    return detect_stuttering_thresholds(audio, [threshold], frame_length, hop_length, rms_frames)[threshold]
+
+
+def detect_stuttering_thresholds(audio, thresholds, frame_length=2048, hop_length=512, rms_frames=None):
+    """
+    여러 threshold의 말더듬(저에너지 구간) 결과를 한 번에 계산합니다.
+    Returns:
+        {threshold: detect_stuttering 결과 dict}
+    """
+    audio, error = _load_for_stuttering(audio)
+    if error is not None:
+        return {threshold: dict(error) for threshold in thresholds}
+
+    energy = rms_frames if rms_frames is not None else audio.rms(frame_length=frame_length, hop_length=hop_length)
+    duration_seconds = audio.duration
+    runs = find_low_energy_runs(energy, audio.sr, hop_length, thresholds, duration_seconds)
+    return {threshold: _stuttering_result(timestamps, duration_seconds)
+            for threshold, timestamps in zip(thresholds, runs)}
 
 def get_stuttering_feedback(stuttering_counts, total_duration_seconds):
     if total_duration_seconds <= 0:
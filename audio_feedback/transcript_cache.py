@@ -0,0 +1,144 @@
+# audio_feedback/transcript_cache.py
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from audio_feedback.word_table import WordTable, as_word_table
+
+DEFAULT_MAX_MB = 512
+_HASH_BLOCK_SAMPLES = 16000 * 30
+
+
+def audio_fingerprint(audio):
+    """디코딩된 PCM(float32) 전체의 SHA-256. memory-map 컨텍스트도 구간 단위로 읽어 해시합니다."""
+    digest = hashlib.sha256()
+    digest.update(str(audio.sr).encode())
+    for start in range(0, audio.num_samples, _HASH_BLOCK_SAMPLES):
+        block = audio.read(start, min(start + _HASH_BLOCK_SAMPLES, audio.num_samples))
+        digest.update(block.tobytes())
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """
+    전사 결과 디스크 캐시.
+    키는 디코딩된 PCM 해시 + 모델/디코딩 설정이며, 결과는 단어 목록을 열 단위(단어/시작/끝)로
+    gzip JSON에 저장합니다. 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다.
+    (조회할 때마다 파일 mtime을 갱신해 LRU 순서로 사용)
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(audio, settings):
+        """settings: 모델 크기, 백엔드, 정밀도, 디코딩 옵션 등 결과에 영향을 주는 값의 dict"""
+        settings_json = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha256((audio_fingerprint(audio) + settings_json).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def get(self, key):
+        """캐시된 (text, duration, WordTable)을 반환합니다. 없으면 None."""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        # 저장된 열을 그대로 WordTable로 만들어 단어별 dict를 생성하지 않습니다.
+        return data["text"], data["duration"], WordTable.from_columns(data["words"], data["starts"], data["ends"])
+
+    def put(self, key, text, duration, word_timestamps):
+        table = as_word_table(word_timestamps)
+        data = {
+            "text": text,
+            "duration": float(duration),
+            "words": table.words,
+            "starts": np.round(table.starts, 3).tolist(),
+            "ends": np.round(table.ends, 3).tolist(),
+        }
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json.gz"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_transcript_cache():
+    """
+    배포 설정으로 만든 공유 캐시를 반환합니다. 캐시는 명시적으로 켠 경우에만 사용합니다.
+    TRANSCRIPT_CACHE_DIR (설정하지 않거나 빈 값이면 비활성, 상대 경로는 기동 시 절대 경로로 고정),
+    TRANSCRIPT_CACHE_MAX_MB (기본 512)
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            directory = os.environ.get("TRANSCRIPT_CACHE_DIR")
+            if not directory:
+                return None
+            max_mb = float(os.environ.get("TRANSCRIPT_CACHE_MAX_MB", DEFAULT_MAX_MB))
+            _cache = TranscriptCache(directory, int(max_mb * 1024 * 1024))
+        return _cache
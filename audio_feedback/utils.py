@@ -2,8 +2,13 @@ import datetime
 import os
 import json
 import math
+import re
 import numpy as np
 
+# 문장 끝 문장부호 ('.', '?', '!', '...'): 모듈 로드 시 한 번 컴파일
+SENTENCE_END_RE = re.compile(r"[.?!]")
+SENTENCE_MAX_WORDS = 20
+
 def generate_analysis_id(video_id: str, analysis_type: str) -> str:
     """
     영상 ID와 분석 타입을 기반으로 고유한 분석 ID를 생성합니다.
@@ -60,17 +65,21 @@ def find_full_sentence(stutter_words_text, full_transcript):
     except Exception:
         return stutter_words_text
 
-def get_sentence_timestamps(word_timestamps, max_words=20):
+def get_sentence_timestamps(word_timestamps, max_words=SENTENCE_MAX_WORDS):
     """
     단어 타임스탬프를 기반으로 문장 단위 타임스탬프를 생성합니다.
+    WordTable을 넘기면 ASR 단계에서 한 번 계산해 둔 문장 목록(id 포함)을 그대로 반환합니다.
     """
+    if hasattr(word_timestamps, "sentences") and max_words == SENTENCE_MAX_WORDS:
+        return word_timestamps.sentences()
+
     sentences = []
     current_sentence_words = []
     
     for i, word_info in enumerate(word_timestamps):
         current_sentence_words.append(word_info)
         
-        is_end_of_sentence = any(p in word_info['word'] for p in ['.', '?', '!', '...'])
+        is_end_of_sentence = SENTENCE_END_RE.search(word_info['word']) is not None
         is_max_length_reached = len(current_sentence_words) >= max_words
         
         if is_end_of_sentence or is_max_length_reached:
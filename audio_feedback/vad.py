@@ -0,0 +1,94 @@
+# audio_feedback/vad.py
+import bisect
+
+import numpy as np
+
+SILENCE_THRESHOLD = 0.008  # stuttering_detector와 같은 무음 기준 RMS
+
+
+def detect_speech_regions(rms_frames, sr=16000, hop_length=512, threshold=SILENCE_THRESHOLD,
+                          pad_sec=0.3, min_gap_sec=1.0, min_speech_sec=0.2):
+    """
+    프레임별 RMS로 발화 구간 [(start_sec, end_sec), ...]을 만듭니다.
+    - min_gap_sec보다 짧은 무음은 발화 중 쉼으로 보고 구간을 합칩니다. (Whisper 문맥 유지)
+    - min_speech_sec보다 짧은 구간(잡음)은 버립니다.
+    - 각 구간을 앞뒤로 pad_sec 만큼 넓힌 뒤 겹치는 구간을 다시 합칩니다.
+    """
+    rms_frames = np.asarray(rms_frames)
+    if len(rms_frames) == 0:
+        return []
+
+    frame_sec = hop_length / float(sr)
+    total_sec = len(rms_frames) * frame_sec
+    voiced = (rms_frames >= threshold).astype(np.int8)
+    # 발화 run의 시작/끝 프레임
+    edges = np.diff(np.concatenate([[0], voiced, [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    regions = []
+    for start, end in zip(starts * frame_sec, ends * frame_sec):
+        if regions and start - regions[-1][1] < min_gap_sec:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    padded = []
+    for start, end in regions:
+        if end - start < min_speech_sec:
+            continue
+        start, end = max(0.0, start - pad_sec), min(total_sec, end + pad_sec)
+        if padded and start <= padded[-1][1]:
+            padded[-1][1] = max(padded[-1][1], end)
+        else:
+            padded.append([start, end])
+    return [(float(start), float(end)) for start, end in padded]
+
+
+class CompactTimeline:
+    """
+    발화 구간만 이어 붙인 오디오의 시각을 원본 타임라인으로 되돌리는 매핑.
+    entries: (압축 오디오 시작 시각, 원본 시작 시각, 길이) 목록
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._starts = [entry[0] for entry in entries]
+
+    def to_original(self, t):
+        i = max(0, bisect.bisect_right(self._starts, t) - 1)
+        compact_start, original_start, length = self.entries[i]
+        # 구간 사이에 넣은 무음에 걸친 시각은 앞 구간의 끝으로 붙입니다.
+        return original_start + min(max(t - compact_start, 0.0), length)
+
+
+def compact_audio(audio, regions, gap_sec=0.2):
+    """
+    AudioContext에서 발화 구간만 읽어 gap_sec 무음을 사이에 두고 이어 붙입니다.
+    Returns:
+        (float32 배열, CompactTimeline)
+    """
+    gap = np.zeros(int(gap_sec * audio.sr), dtype=np.float32)
+    parts, entries = [], []
+    cursor = 0
+    for start, end in regions:
+        samples = audio.read(int(round(start * audio.sr)), int(round(end * audio.sr)))
+        if parts:
+            parts.append(gap)
+            cursor += len(gap)
+        entries.append((cursor / float(audio.sr), start, len(samples) / float(audio.sr)))
+        parts.append(samples)
+        cursor += len(samples)
+    samples = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    return samples, CompactTimeline(entries)
+
+
+def remap_transcription(result, timeline):
+    """Whisper transcribe 결과의 segment/word 시각을 원본 타임라인으로 바꿉니다. (in-place)"""
+    for segment in result["segments"]:
+        segment["start"] = timeline.to_original(segment["start"])
+        segment["end"] = timeline.to_original(segment["end"])
+        for word in segment.get("words", []):
+            word["start"] = timeline.to_original(word["start"])
+            word["end"] = timeline.to_original(word["end"])
+    return result
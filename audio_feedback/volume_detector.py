@@ -1,43 +1,86 @@
 import numpy as np
-from .utils import convert_rms_to_db, get_sentence_timestamps
+from .utils import get_sentence_timestamps
 
-def detect_volume_anomalies_by_sentence(rms_frames, avg_rms_db, sr=16000, hop_length=512, word_timestamps=None):
+SILENT_DB = -120.0
+
+
+def sentence_decibels(rms_frames, sentences, sr=16000, hop_length=512):
     """
-    문장별 평균 RMS 값을 분석하여 음량이 정상 범주를 벗어나는 문장을 감지합니다.
-    평균 음량을 기준으로 동적 임계값을 설정합니다.
+    문장별 평균 RMS(dB)를 누적합으로 한 번에 계산합니다.
+    문장 프레임 범위는 [int(start * frame_rate), int(end * frame_rate)) 이며, 프레임이 없는 문장은 NaN입니다.
+    Returns:
+        문장 순서대로의 dB 배열
+    """
+    if not sentences:
+        return np.zeros(0, dtype=np.float64)
+    rms_frames = np.asarray(rms_frames, dtype=np.float64)
+    num_frames = len(rms_frames)
+    frame_rate = sr / hop_length
+    csum = np.concatenate([[0.0], np.cumsum(rms_frames)])
+
+    starts = np.array([s['start'] for s in sentences], dtype=np.float64)
+    ends = np.array([s['end'] for s in sentences], dtype=np.float64)
+    # int()와 같은 0 방향 버림, 슬라이스처럼 프레임 수로 자름
+    start_frames = np.minimum(np.trunc(starts * frame_rate).astype(np.int64), num_frames)
+    end_frames = np.minimum(np.trunc(ends * frame_rate).astype(np.int64), num_frames)
+    start_frames = np.maximum(start_frames, 0)
+    end_frames = np.maximum(end_frames, 0)
+    lengths = end_frames - start_frames
+
+    decibels = np.full(len(sentences), np.nan)
+    has_frames = lengths > 0
+    means = (csum[end_frames[has_frames]] - csum[start_frames[has_frames]]) / lengths[has_frames]
+    with np.errstate(divide='ignore'):
+        decibels[has_frames] = np.where(means > 0, 20 * np.log10(np.maximum(means, 1e-300)), SILENT_DB)
+    return decibels
+
+
+def analyze_sentence_volume(rms_frames, avg_rms_db, sr=16000, hop_length=512, word_timestamps=None, sentences=None):
     """
-    if word_timestamps is None or not word_timestamps:
-        return []
-        
+    문장별 음량(dB) 전체와 정상 범주를 벗어난 문장 목록을 함께 반환합니다.
+    평균 음량을 기준으로 +-5dB 동적 임계값을 사용합니다.
+    sentences: analyze_audio_features가 전사 단계에서 만든 문장 목록 (없으면 word_timestamps로 분할)
+    Returns:
+        {"anomalies": [...], "sentence_decibels": [{"sentence_id", "sentence", "start", "end", "avg_decibels"}, ...]}
+    """
+    if sentences is None:
+        if word_timestamps is None or not len(word_timestamps):
+            return {"anomalies": [], "sentence_decibels": []}
+        sentences = get_sentence_timestamps(word_timestamps)
+
     quiet_db_threshold = avg_rms_db - 5.0
     loud_db_threshold = avg_rms_db + 5.0
 
-    frame_rate = sr / hop_length
-    sentences = get_sentence_timestamps(word_timestamps)
+    decibels = sentence_decibels(rms_frames, sentences, sr, hop_length)
+    valid = ~np.isnan(decibels)
+    quiet = valid & (decibels < quiet_db_threshold)
+    loud = valid & ~quiet & (decibels > loud_db_threshold)
+
+    series = []
     anomalies = []
+    for i in np.flatnonzero(valid):
+        sentence = sentences[i]
+        series.append({
+            "sentence_id": sentence.get('id', int(i)),
+            "sentence": sentence['text'],
+            "start": round(float(sentence['start']), 2),
+            "end": round(float(sentence['end']), 2),
+            "avg_decibels": round(float(decibels[i]), 2)
+        })
+        if quiet[i] or loud[i]:
+            anomalies.append({
+                "sentence": sentence['text'],
+                "timestamp": f"{sentence['start']:.2f}s - {sentence['end']:.2f}s",
+                "avg_decibels": round(float(decibels[i]), 2),
+                "feedback": "음량이 너무 작습니다." if quiet[i] else "음량이 너무 큽니다."
+            })
+    return {"anomalies": anomalies, "sentence_decibels": series}
+
 
-    for sentence in sentences:
-        start_frame = int(sentence['start'] * frame_rate)
-        end_frame = int(sentence['end'] * frame_rate)
-        
-        sentence_rms_frames = rms_frames[start_frame:end_frame]
-        
-        if len(sentence_rms_frames) > 0:
-            avg_rms_sentence = np.mean(sentence_rms_frames)
-            avg_db_sentence = convert_rms_to_db(avg_rms_sentence)
-
-            feedback_message = ""
-            if avg_db_sentence < quiet_db_threshold:
-                feedback_message = "음량이 너무 작습니다."
-            elif avg_db_sentence > loud_db_threshold:
-                feedback_message = "음량이 너무 큽니다."
-            
-            if feedback_message:
-                anomalies.append({
-                    "sentence": sentence['text'],
-                    "timestamp": f"{sentence['start']:.2f}s - {sentence['end']:.2f}s",
-                    "avg_decibels": round(float(avg_db_sentence), 2),
-                    "feedback": feedback_message
-                })
-    
-    return anomalies
\ No newline at end of file
+def detect_volume_anomalies_by_sentence(rms_frames, avg_rms_db, sr=16000, hop_length=512, word_timestamps=None,
+                                        sentences=None):
+    """
+    문장별 평균 RMS 값을 분석하여 음량이 정상 범주를 벗어나는 문장을 감지합니다.
+    평균 음량을 기준으로 동적 임계값을 설정합니다.
+    """
+    return analyze_sentence_volume(rms_frames, avg_rms_db, sr, hop_length, word_timestamps, sentences)["anomalies"]
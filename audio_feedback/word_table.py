@@ -0,0 +1,116 @@
+# audio_feedback/word_table.py
+import numpy as np
+
+from audio_feedback.utils import SENTENCE_END_RE, SENTENCE_MAX_WORDS
+
+
+class WordTable:
+    """
+    단어 타임스탬프의 열(column) 단위 표현.
+    단어 문자열은 중복 없는 문자열 테이블(strings)과 코드 배열(codes)로, 시작/끝 시각은 float 배열로 보관합니다.
+    기존 코드와 호환되도록 len(), 인덱싱(word dict), 반복(word dict 생성)을 지원하지만,
+    열을 직접 쓰는 경로(time_slice, sentence_ids, to_json)는 단어별 dict를 만들지 않습니다.
+    """
+
+    def __init__(self, strings, codes, starts, ends):
+        self.strings = strings
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self._sentence_ids = None
+        self._sentences = None
+
+    @classmethod
+    def from_columns(cls, words, starts, ends):
+        table = {}
+        codes = [table.setdefault(word, len(table)) for word in words]
+        return cls(list(table), codes, starts, ends)
+
+    @classmethod
+    def from_dicts(cls, word_timestamps):
+        """[{"word", "start", "end"}, ...] 목록에서 만듭니다."""
+        return cls.from_columns([w['word'] for w in word_timestamps],
+                                [w['start'] for w in word_timestamps],
+                                [w['end'] for w in word_timestamps])
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return WordTable(self.strings, self.codes[key], self.starts[key], self.ends[key])
+        return {"word": self.strings[self.codes[key]], "start": float(self.starts[key]), "end": float(self.ends[key])}
+
+    def __iter__(self):
+        for code, start, end in zip(self.codes.tolist(), self.starts.tolist(), self.ends.tolist()):
+            yield {"word": self.strings[code], "start": start, "end": end}
+
+    @property
+    def words(self):
+        return [self.strings[code] for code in self.codes.tolist()]
+
+    def is_sorted(self):
+        return bool(np.all(self.starts[1:] >= self.starts[:-1]))
+
+    def time_slice(self, start_sec, end_sec):
+        """start_sec <= 단어 시작 < end_sec 인 단어들의 WordTable (정렬되어 있으면 view)"""
+        if self.is_sorted():
+            first = int(np.searchsorted(self.starts, start_sec, side='left'))
+            last = int(np.searchsorted(self.starts, end_sec, side='left'))
+            return self[first:max(first, last)]
+        mask = (self.starts >= start_sec) & (self.starts < end_sec)
+        return WordTable(self.strings, self.codes[mask], self.starts[mask], self.ends[mask])
+
+    def sentence_ids(self):
+        """
+        단어별 문장 번호. get_sentence_timestamps와 같은 규칙(문장부호로 끝나거나 20단어)이며 한 번만 계산합니다.
+        문장부호 검사는 문자열 테이블의 고유 문자열마다 한 번만 합니다.
+        """
+        if self._sentence_ids is None:
+            ends_sentence = np.array([SENTENCE_END_RE.search(word) is not None for word in self.strings],
+                                     dtype=bool)
+            is_end = ends_sentence[self.codes] if len(self.codes) else np.zeros(0, dtype=bool)
+            # 문장부호로 나뉜 구간 안에서의 위치가 20의 배수인 단어에서 새 문장이 시작됩니다.
+            new_run = np.concatenate([[True], is_end[:-1]]) if len(is_end) else is_end
+            run_start = np.maximum.accumulate(np.where(new_run, np.arange(len(is_end)), 0))
+            position = np.arange(len(is_end)) - run_start
+            new_sentence = new_run | (position % SENTENCE_MAX_WORDS == 0)
+            self._sentence_ids = np.cumsum(new_sentence) - 1
+        return self._sentence_ids
+
+    def sentences(self):
+        """
+        문장 목록 [{"id", "text", "start", "end"}, ...] (get_sentence_timestamps와 같은 문장).
+        작업마다 한 번만 계산해 두고 문장을 쓰는 모든 단계가 같은 목록과 id를 공유합니다.
+        """
+        if self._sentences is None:
+            ids = self.sentence_ids()
+            firsts = np.flatnonzero(np.diff(np.concatenate([[-1], ids])) != 0)
+            lasts = np.concatenate([firsts[1:], [len(ids)]]) - 1
+            words = self.words
+            self._sentences = [
+                {
+                    "id": sentence_id,
+                    "text": " ".join(words[first:last + 1]).strip(),
+                    "start": float(self.starts[first]),
+                    "end": float(self.ends[last]),
+                }
+                for sentence_id, (first, last) in enumerate(zip(firsts.tolist(), lasts.tolist()))
+            ]
+        return self._sentences
+
+    def to_json(self, decimals=3):
+        """콜백 JSON용 열 단위 dict: {"words", "start", "end", "sentence_id"}"""
+        return {
+            "words": self.words,
+            "start": np.round(self.starts, decimals).tolist(),
+            "end": np.round(self.ends, decimals).tolist(),
+            "sentence_id": self.sentence_ids().tolist(),
+        }
+
+
+def as_word_table(word_timestamps):
+    """WordTable 또는 word dict 목록을 WordTable로 반환합니다."""
+    if isinstance(word_timestamps, WordTable):
+        return word_timestamps
+    return WordTable.from_dicts(word_timestamps or [])
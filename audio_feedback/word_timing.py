@@ -0,0 +1,91 @@
+# audio_feedback/word_timing.py
+import re
+
+import numpy as np
+
+from audio_feedback.vad import SILENCE_THRESHOLD
+
+WORD_TIMING_MODES = ("dtw", "segment", "energy")
+
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+def split_segment_words(text):
+    """segment 텍스트를 Whisper 단어 형식(앞 공백 포함)으로 나눕니다."""
+    return [" " + word for word in _WORD_PATTERN.findall(text)]
+
+
+def segment_word_timestamps(segment):
+    """
+    DTW 정렬 없이 segment의 시작/끝 시각을 글자 수 비율로 나눠 단어 시각을 근사합니다.
+    Returns:
+        [{"word", "start", "end"}, ...]
+    """
+    words = split_segment_words(segment["text"])
+    if not words:
+        return []
+    start, end = float(segment["start"]), float(segment["end"])
+    lengths = [len(word.strip()) for word in words]
+    total = float(sum(lengths))
+    timestamps = []
+    cursor = start
+    for word, length in zip(words, lengths):
+        word_end = cursor + (end - start) * length / total
+        timestamps.append({"word": word, "start": round(cursor, 2), "end": round(word_end, 2)})
+        cursor = word_end
+    return timestamps
+
+
+def energy_word_timestamps(segment, rms_frames, sr=16000, hop_length=512, threshold=SILENCE_THRESHOLD):
+    """
+    segment 안에서 RMS가 threshold 이상인(발화) 프레임에만 글자 수 비율로 단어를 배치합니다.
+    segment 중간의 쉼에는 단어가 놓이지 않으므로 균등 분할보다 문장/말더듬 구간 경계에 가깝습니다.
+    발화 프레임이 없으면 segment_word_timestamps와 같습니다.
+    """
+    words = split_segment_words(segment["text"])
+    if not words:
+        return []
+    frame_sec = hop_length / float(sr)
+    first = max(0, int(segment["start"] / frame_sec))
+    last = min(len(rms_frames), int(np.ceil(segment["end"] / frame_sec)))
+    voiced = np.flatnonzero(np.asarray(rms_frames[first:last]) >= threshold) + first
+    if len(voiced) == 0:
+        return segment_word_timestamps(segment)
+
+    # 누적 글자 비율 -> 발화 프레임 순번 -> 시각
+    lengths = np.array([len(word.strip()) for word in words], dtype=np.float64)
+    bounds = np.concatenate([[0.0], np.cumsum(lengths) / lengths.sum()]) * len(voiced)
+    starts = voiced[np.minimum(bounds[:-1].astype(int), len(voiced) - 1)] * frame_sec
+    ends = (voiced[np.maximum(np.ceil(bounds[1:]).astype(int) - 1, 0)] + 1) * frame_sec
+    # 한 프레임을 두 단어가 나눠 가지면 앞 단어를 다음 단어 시작에서 끝냅니다.
+    ends[:-1] = np.minimum(ends[:-1], starts[1:])
+    seg_start, seg_end = float(segment["start"]), float(segment["end"])
+    timestamps = []
+    for word, start, end in zip(words, starts, ends):
+        start = min(max(float(start), seg_start), seg_end)
+        end = min(max(float(end), start), seg_end)
+        timestamps.append({"word": word, "start": round(start, 2), "end": round(end, 2)})
+    return timestamps
+
+
+def add_segment_word_timestamps(result):
+    """Whisper 결과의 각 segment에 근사 단어 시각("words")을 채웁니다. (in-place)"""
+    for segment in result["segments"]:
+        segment["words"] = segment_word_timestamps(segment)
+    return result
+
+
+def add_energy_word_timestamps(result, rms_frames, sr=16000, hop_length=512):
+    """Whisper 결과의 각 segment에 RMS 포락선 기반 근사 단어 시각을 채웁니다. (in-place)"""
+    for segment in result["segments"]:
+        segment["words"] = energy_word_timestamps(segment, rms_frames, sr, hop_length)
+    return result
+
+
+def add_word_timing(result, mode, rms_frames=None, sr=16000, hop_length=512):
+    """mode("segment", "energy")에 맞게 근사 단어 시각을 채웁니다. "dtw"는 Whisper가 이미 채웠으므로 그대로 둡니다."""
+    if mode == "segment":
+        return add_segment_word_timestamps(result)
+    if mode == "energy":
+        return add_energy_word_timestamps(result, rms_frames, sr, hop_length)
+    return result
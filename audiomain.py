@@ -1,21 +1,19 @@
-import os
 import time
 import json
-import tempfile
 import math
 import numpy as np
 
-from audio_feedback.extract_audio import extract_audio_from_video
-from audio_feedback.analyze_audio import analyze_audio_features , analyze_audio_segment
+from audio_feedback.audio_context import AudioContext, MappedAudioContext
+from audio_feedback.analyze_audio import analyze_audio_features
+from audio_feedback.feature_tracks import FeatureTracks
+from audio_feedback.interval_index import TimestampIndex
+from audio_feedback.word_table import as_word_table
 from audio_feedback.stuttering_detector import detect_stuttering
 from audio_feedback.feedback_generator import generate_audio_feedback
-from audio_feedback.volume_detector import detect_volume_anomalies_by_sentence
+from audio_feedback.volume_detector import analyze_sentence_volume
 from audio_feedback.utils import (
     
-    convert_rms_to_db,
-    get_stutter_words_at_timestamp,
-    find_full_sentence,
-    get_sentence_timestamps
+    convert_rms_to_db
 )
 
 # Import the updated audio feedback generator.
@@ -25,146 +23,156 @@ from audio_feedback.feedback_generator import generate_audio_feedback
 # === JSON file saving related functions ===
 
 
-def amain(video_path, analysis_id, presentation_id):
-
-    # Temporary path where the extracted audio file will be saved
-    with tempfile.TemporaryDirectory(prefix=f"audio_{analysis_id}_") as tmpdir:
-        # === Audio extraction ===
-        audio_path = os.path.join(tmpdir, f"{presentation_id}.wav")
-        start_time = time.time()
-        print("=== 1. 오디오 추출 중 ===")
-        start = time.time()
-        extract_audio_from_video(video_path, audio_path)
-        end = time.time()
-        print(f"[✓] 소요 시간: {end - start:.2f}초")
-
-        print("=== 2. 오디오 분석 중 (전체) ===")
-        start = time.time()
-        features = analyze_audio_features(audio_path)
-        end = time.time()
-        print(f"[✓] 소요 시간: {end - start:.2f}초")
-    
-        total_duration = features['duration_sec']
-        avg_rms = features['avg_rms']
-        avg_rms_db = convert_rms_to_db(avg_rms)
-
-         # 45초 단위 분석 결과를 저장할 리스트를 분리
-        speed_segments = []
-        pitch_segments = []
-        segment_duration = 45 # 45초 단위로 변경
-    
-        print("=== 3. 오디오 분석 중 (45초 구간별) ===")
-        start = time.time()
-        # 45초 간격으로 반복
-        for i in range(0, int(total_duration), segment_duration):
-            segment_start = i
-            segment_end = min(i + segment_duration, total_duration)
-            if segment_end - segment_start > 0:
-                segment_analysis = analyze_audio_segment(
-                    audio_path,
-                    segment_start,
-                    segment_end,
-                    features['word_timestamps']
-                )
-            # 말속도 세그먼트 데이터 저장
-            speed_segments.append({
-                "start_time_sec": round(float(segment_analysis.get("start_time_sec", 0)), 2),
-                "end_time_sec": round(float(segment_analysis.get("end_time_sec", 0)), 2),
-                "value": round(float(segment_analysis.get("speaking_rate_wpm", 0)), 2)
-            })
-            # 피치 세그먼트 데이터 저장
-            pitch_segments.append({
-                "start_time_sec": round(float(segment_analysis.get("start_time_sec", 0)), 2),
-                "end_time_sec": round(float(segment_analysis.get("end_time_sec", 0)), 2),
-                "value": round(float(segment_analysis.get("avg_pitch_hz", 0)), 2)
-            })
-        end = time.time()
-        print(f"[✓] 소요 시간: {end - start:.2f}초")
-
-        print("=== 4. 말더듬 감지 중 ===")
-        start = time.time()
-        stutter_results = detect_stuttering(audio_path)
-        end = time.time()
-        print(f"[✓] 소요 시간: {end - start:.2f}초")
-
-        print("=== 5. 피드백 생성 중 ===")
-        audio_feedback_results = generate_audio_feedback(features, avg_rms_db)
+def amain(video_path, analysis_id, presentation_id, memory_mapped=False, vad_gating=False, asr_workers=None,
+          asr_profile=None, segment_sec=45, include_words=False):
+    # memory_mapped=True: 수 시간짜리 녹음용. PCM을 디스크에 두고 memory-map으로 구간만 읽어
+    # 녹음 길이와 관계없이 최대 메모리를 일정하게 유지합니다.
+    # vad_gating=True: 발화 구간만 전사해 침묵이 긴 녹음의 ASR 시간을 줄입니다.
+    # asr_workers=N: 긴 발표를 청크로 나눠 N개 프로세스에서 병렬 전사합니다.
+    # asr_profile: Whisper 디코딩 프로필 ("accurate": 기본, "fast": 언어 고정/greedy/DTW 생략)
+    # segment_sec: 말속도/피치 구간 길이(초) 또는 "sentence"(문장 단위). 기본 45초
+    # include_words=True: 결과에 단어 타임스탬프를 열 단위(words/start/end/sentence_id)로 포함합니다.
+
+    # === Audio extraction ===
+    # ffmpeg 출력을 메모리로 바로 읽어 임시 WAV 파일 쓰기/읽기를 생략합니다.
+    # 이후 단계는 모두 같은 버퍼를 공유합니다.
+    start_time = time.time()
+    print("=== 1. 오디오 추출 중 ===")
+    start = time.time()
+    audio = MappedAudioContext.from_video(video_path) if memory_mapped else AudioContext.from_video(video_path)
+    end = time.time()
+    print(f"[✓] 소요 시간: {end - start:.2f}초")
+
+    # 분석 중 예외가 나도 memory-map 파일/임시 WAV를 정리합니다.
+    try:
+        return _analyze(audio, vad_gating, asr_workers, asr_profile, segment_sec, include_words)
+    finally:
+        audio.close()
+
+
+def _analyze(audio, vad_gating, asr_workers, asr_profile, segment_sec, include_words):
+    print("=== 2. 오디오 분석 중 (전체) ===")
+    start = time.time()
+    features = analyze_audio_features(audio, vad_gating=vad_gating, asr_workers=asr_workers,
+                                      asr_profile=asr_profile)
+    end = time.time()
+    print(f"[✓] 소요 시간: {end - start:.2f}초")
+
+    total_duration = features['duration_sec']
+    avg_rms = features['avg_rms']
+    avg_rms_db = convert_rms_to_db(avg_rms)
+
+     # 구간별 분석 결과를 저장할 리스트를 분리
+    speed_segments = []
+    pitch_segments = []
+
+    segment_label = "문장" if segment_sec == "sentence" else f"{segment_sec}초"
+    print(f"=== 3. 오디오 분석 중 ({segment_label} 구간별) ===")
+    start = time.time()
+    # 프레임 트랙 누적합을 한 번 만들고, 구간마다 상수 시간으로 조회합니다.
+    tracks = FeatureTracks.from_features(features, audio.num_samples, sr=audio.sr, hop_length=512)
+    for segment_analysis in tracks.windows(segment_sec, total_duration, features['sentences']):
+        # 말속도 세그먼트 데이터 저장
+        speed_segments.append({
+            "start_time_sec": round(float(segment_analysis.get("start_time_sec", 0)), 2),
+            "end_time_sec": round(float(segment_analysis.get("end_time_sec", 0)), 2),
+            "value": round(float(segment_analysis.get("speaking_rate_wpm", 0)), 2)
+        })
+        # 피치 세그먼트 데이터 저장
+        pitch_segments.append({
+            "start_time_sec": round(float(segment_analysis.get("start_time_sec", 0)), 2),
+            "end_time_sec": round(float(segment_analysis.get("end_time_sec", 0)), 2),
+            "value": round(float(segment_analysis.get("avg_pitch_hz", 0)), 2)
+        })
+    end = time.time()
+    print(f"[✓] 소요 시간: {end - start:.2f}초")
+
+    print("=== 4. 말더듬 감지 중 ===")
+    start = time.time()
+    # 전체 분석에서 계산한 RMS 프레임을 재사용합니다.
+    stutter_results = detect_stuttering(audio, rms_frames=features['rms_frames'])
+    end = time.time()
+    print(f"[✓] 소요 시간: {end - start:.2f}초")
+
+    print("=== 5. 피드백 생성 중 ===")
+    audio_feedback_results = generate_audio_feedback(features, avg_rms_db)
+
+    # 전사 단계에서 한 번 분할한 문장 목록을 음량 분석과 말더듬 문장 찾기에 함께 씁니다.
+    sentences_with_timestamps = features['sentences']
+
+    # 문장별 dB를 누적합으로 한 번에 계산하고, 이상 문장과 전체 문장 dB 시계열을 함께 받습니다.
+    sentence_volume = analyze_sentence_volume(
+        features['rms_frames'],
+        avg_rms_db,
+        sr=16000,
+        hop_length=512,
+        sentences=sentences_with_timestamps
+    )
+    volume_anomalies = sentence_volume["anomalies"]
+
+    stutter_count = stutter_results['stutter_count']
+    stuttering_timestamps = stutter_results['stuttering_timestamps']
+    stutter_feedback = stutter_results['stuttering_feedback']
+
+    # 단어/문장 구간 인덱스를 한 번 만들고 말더듬 구간마다 bisect로 찾습니다.
+    timestamp_index = TimestampIndex(features['word_timestamps'], sentences_with_timestamps, features['transcript'])
+    stutter_by_sentence = {}
+    for timestamp in stuttering_timestamps:
+        stutter_words, full_sentence = timestamp_index.attribute(timestamp)
+
+        if full_sentence not in stutter_by_sentence:
+            stutter_by_sentence[full_sentence] = {
+                "timestamps": [],
+                "stutter_words": []
+            }
     
-        volume_anomalies = detect_volume_anomalies_by_sentence(
-            features['rms_frames'], 
-            avg_rms_db, 
-            sr=16000, 
-            hop_length=512, 
-            word_timestamps=features['word_timestamps']
+        stutter_by_sentence[full_sentence]["timestamps"].append(
+            f"{timestamp['start']:.2f}s - {timestamp['end']:.2f}s"
         )
+        stutter_by_sentence[full_sentence]["stutter_words"].append(stutter_words)
+
+    stutter_details = []
+    for sentence, details in stutter_by_sentence.items():
+        stutter_details.append({
+            "sentence": sentence,
+            "timestamps": details["timestamps"],
+            "stutter_words": details["stutter_words"]
+        })
+
+    final_feedback_report = {
+            "speed": {
+                "feedback": audio_feedback_results.get("speed_feedback", ""),
+                "value": round(float(audio_feedback_results.get("speaking_rate_wpm", 0.0)), 2),
+                "level": audio_feedback_results.get("speed_level", ""),
+                "segments": speed_segments
+            },
+            "pitch": {
+                "feedback": audio_feedback_results.get("pitch_feedback", ""),
+                "value": round(float(audio_feedback_results.get("avg_pitch_hz", 0.0)), 2),
+                "level": audio_feedback_results.get("pitch_level", ""),
+                "segments": pitch_segments
+            },
+            "volume": {
+                "feedback": audio_feedback_results.get("volume_feedback", ""),
+                "decibels": round(float(avg_rms_db), 2),
+                "level": audio_feedback_results.get("volume_level", ""),
+                "volume_anomalies": volume_anomalies,
+                "sentence_decibels": sentence_volume["sentence_decibels"]
+            },
+            "stutter": {
+                "feedback": stutter_feedback,
+                "stutter_count": stutter_count,
+                "stutter_details": stutter_details
+            }
     
-        sentences_with_timestamps = get_sentence_timestamps(features['word_timestamps'])
-    
-        stutter_count = stutter_results['stutter_count']
-        stuttering_timestamps = stutter_results['stuttering_timestamps']
-        stutter_feedback = stutter_results['stuttering_feedback']
-    
-        stutter_by_sentence = {}
-        for timestamp in stuttering_timestamps:
-            stutter_words = get_stutter_words_at_timestamp(timestamp, features['word_timestamps'])
-        
-            full_sentence = ""
-            for sentence in sentences_with_timestamps:
-                if timestamp['start'] >= sentence['start'] and timestamp['end'] <= sentence['end']:
-                    full_sentence = sentence['text']
-                    break
-        
-            if not full_sentence:
-                full_sentence = find_full_sentence(stutter_words, features['transcript'])
-
-            if full_sentence not in stutter_by_sentence:
-                stutter_by_sentence[full_sentence] = {
-                    "timestamps": [],
-                    "stutter_words": []
-                }
-        
-            stutter_by_sentence[full_sentence]["timestamps"].append(
-                f"{timestamp['start']:.2f}s - {timestamp['end']:.2f}s"
-            )
-            stutter_by_sentence[full_sentence]["stutter_words"].append(stutter_words)
-    
-        stutter_details = []
-        for sentence, details in stutter_by_sentence.items():
-            stutter_details.append({
-                "sentence": sentence,
-                "timestamps": details["timestamps"],
-                "stutter_words": details["stutter_words"]
-            })
-    
-        final_feedback_report = {
-                "speed": {
-                    "feedback": audio_feedback_results.get("speed_feedback", ""),
-                    "value": round(float(audio_feedback_results.get("speaking_rate_wpm", 0.0)), 2),
-                    "level": audio_feedback_results.get("speed_level", ""),
-                    "segments": speed_segments
-                },
-                "pitch": {
-                    "feedback": audio_feedback_results.get("pitch_feedback", ""),
-                    "value": round(float(audio_feedback_results.get("avg_pitch_hz", 0.0)), 2),
-                    "level": audio_feedback_results.get("pitch_level", ""),
-                    "segments": pitch_segments
-                },
-                "volume": {
-                    "feedback": audio_feedback_results.get("volume_feedback", ""),
-                    "decibels": round(float(avg_rms_db), 2),
-                    "level": audio_feedback_results.get("volume_level", ""),
-                    "volume_anomalies": volume_anomalies
-                },
-                "stutter": {
-                    "feedback": stutter_feedback,
-                    "stutter_count": stutter_count,
-                    "stutter_details": stutter_details
-                }
-        
-        }
-
-        print(final_feedback_report)
-        return final_feedback_report
+    }
+
+    if include_words:
+        # 단어별 dict를 만들지 않고 WordTable의 열을 그대로 직렬화합니다.
+        final_feedback_report["words"] = as_word_table(features['word_timestamps']).to_json()
+
+    print(final_feedback_report)
+    return final_feedback_report
     
 
 # Call the main function when the script is executed directly
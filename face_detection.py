@@ -58,19 +58,23 @@ def distance2kps(points, distance, max_shape=None):
 
 class FaceDetector:
 
-    def __init__(self, model_file):
+    def __init__(self, model_file, num_threads=None):
         """Initialize a face detector.
 
         Args:
             model_file (str): ONNX model file path.
+            num_threads (int, optional): intra-op threads for the session. None uses all cores.
         """
         assert os.path.exists(model_file), f"File not found: {model_file}"
 
         self.center_cache = {}
         self.nms_threshold = 0.4
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
         self.session = onnxruntime.InferenceSession(
-            #model_file, providers=['CUDAExecutionProvider', 'CPUExecutionProvider'])
-            model_file, providers=['CPUExecutionProvider'])
+            #model_file, sess_options=options, providers=['CUDAExecutionProvider', 'CPUExecutionProvider'])
+            model_file, sess_options=options, providers=['CPUExecutionProvider'])
 
         # Get model configurations from the model file.
         # What is the input like?
@@ -79,6 +83,10 @@ class FaceDetector:
         input_shape = input_cfg.shape
         self.input_size = tuple(input_shape[2:4][::-1])
 
+        # Models exported with a fixed batch of 1 take one image per run;
+        # only a dynamic batch dimension lets forward_batch() save session runs.
+        self.dynamic_batch = not (isinstance(input_shape[0], int) and input_shape[0] == 1)
+
         # How about the outputs?
         outputs = self.session.get_outputs()
         output_names = []
@@ -120,6 +128,42 @@ class FaceDetector:
 
         return inputs.astype(np.float32)
 
+    def _anchor_centers(self, input_height, input_width, stride):
+        """Anchor centers of one stride level, shape (height * width * num_anchors, 2)."""
+        height = input_height // stride
+        width = input_width // stride
+        key = (height, width, stride)
+
+        if key in self.center_cache:
+            return self.center_cache[key]
+
+        # solution-3:
+        anchor_centers = np.stack(
+            np.mgrid[:height, :width][::-1], axis=-1).astype(np.float32)
+        anchor_centers = (anchor_centers * stride).reshape((-1, 2))
+
+        if self._num_anchors > 1:
+            anchor_centers = np.stack(
+                [anchor_centers] * self._num_anchors, axis=1).reshape((-1, 2))
+
+        if len(self.center_cache) < 100:
+            self.center_cache[key] = anchor_centers
+
+        # solution-1, c style:
+        # anchor_centers = np.zeros( (height, width, 2), dtype=np.float32 )
+        # for i in range(height):
+        #    anchor_centers[i, :, 1] = i
+        # for i in range(width):
+        #    anchor_centers[:, i, 0] = i
+
+        # solution-2:
+        # ax = np.arange(width, dtype=np.float32)
+        # ay = np.arange(height, dtype=np.float32)
+        # xv, yv = np.meshgrid(np.arange(width), np.arange(height))
+        # anchor_centers = np.stack([xv, yv], axis=-1).astype(np.float32)
+
+        return anchor_centers
+
     def forward(self, img, threshold):
         scores_list = []
         bboxes_list = []
@@ -140,37 +184,7 @@ class FaceDetector:
                 kps_preds = predictions[idx + offset * 2] * stride
 
             # Generate the anchors.
-            height = input_height // stride
-            width = input_width // stride
-            key = (height, width, stride)
-
-            if key in self.center_cache:
-                anchor_centers = self.center_cache[key]
-            else:
-                # solution-3:
-                anchor_centers = np.stack(
-                    np.mgrid[:height, :width][::-1], axis=-1).astype(np.float32)
-                anchor_centers = (anchor_centers * stride).reshape((-1, 2))
-
-                if self._num_anchors > 1:
-                    anchor_centers = np.stack(
-                        [anchor_centers] * self._num_anchors, axis=1).reshape((-1, 2))
-
-                if len(self.center_cache) < 100:
-                    self.center_cache[key] = anchor_centers
-
-                # solution-1, c style:
-                # anchor_centers = np.zeros( (height, width, 2), dtype=np.float32 )
-                # for i in range(height):
-                #    anchor_centers[i, :, 1] = i
-                # for i in range(width):
-                #    anchor_centers[:, i, 0] = i
-
-                # solution-2:
-                # ax = np.arange(width, dtype=np.float32)
-                # ay = np.arange(height, dtype=np.float32)
-                # xv, yv = np.meshgrid(np.arange(width), np.arange(height))
-                # anchor_centers = np.stack([xv, yv], axis=-1).astype(np.float32)
+            anchor_centers = self._anchor_centers(input_height, input_width, stride)
 
             # Filter the results by scores and threshold.
             pos_inds = np.where(scores_pred >= threshold)[0]
@@ -219,9 +233,8 @@ class FaceDetector:
 
         return keep
 
-    def detect(self, img, threshold=0.5, input_size=None, max_num=1, metric='default'):
-        input_size = self.input_size if input_size is None else input_size
-
+    def _letterbox(self, img, input_size):
+        """Resize the image into the top-left corner of a zero input_size canvas."""
         # Rescale the image?
         img_height, img_width, _ = img.shape
         ratio_img = float(img_height) / img_width
@@ -242,15 +255,17 @@ class FaceDetector:
         det_img = np.zeros((input_size[1], input_size[0], 3), dtype=np.uint8)
         det_img[:new_height, :new_width, :] = resized_img
 
-        scores_list, bboxes_list, kpss_list = self.forward(det_img, threshold)
-        scores = np.vstack(scores_list)
+        return det_img, det_scale
+
+    def _postprocess(self, scores, bboxes, kpss, det_scale, img_shape, max_num, metric):
+        """Rescale, sort, NMS and pick the top faces of one image's candidates."""
         scores_ravel = scores.ravel()
         order = scores_ravel.argsort()[::-1]
 
-        bboxes = np.vstack(bboxes_list) / det_scale
+        bboxes = bboxes / det_scale
 
         if self._with_kps:
-            kpss = np.vstack(kpss_list) / det_scale
+            kpss = kpss / det_scale
         pre_det = np.hstack((bboxes, scores)).astype(np.float32, copy=False)
         pre_det = pre_det[order, :]
 
@@ -266,7 +281,7 @@ class FaceDetector:
 
         if max_num > 0 and det.shape[0] > max_num:
             area = (det[:, 2] - det[:, 0]) * (det[:, 3] - det[:, 1])
-            img_center = img.shape[0] // 2, img.shape[1] // 2
+            img_center = img_shape[0] // 2, img_shape[1] // 2
             offsets = np.vstack([
                 (det[:, 0] + det[:, 2]) / 2 - img_center[1],
                 (det[:, 1] + det[:, 3]) / 2 - img_center[0]])
@@ -289,6 +304,103 @@ class FaceDetector:
 
         return det, kpss
 
+    def detect(self, img, threshold=0.5, input_size=None, max_num=1, metric='default'):
+        input_size = self.input_size if input_size is None else input_size
+
+        det_img, det_scale = self._letterbox(img, input_size)
+
+        scores_list, bboxes_list, kpss_list = self.forward(det_img, threshold)
+        scores = np.vstack(scores_list)
+        bboxes = np.vstack(bboxes_list)
+        kpss = np.vstack(kpss_list) if self._with_kps else None
+
+        return self._postprocess(scores, bboxes, kpss, det_scale, img.shape, max_num, metric)
+
+    def _preprocess_batch(self, images):
+        """Same normalization as _preprocess for a list of equally sized BGR images, shape (N, 3, H, W)."""
+        inputs = np.stack(images)[..., ::-1].astype(np.float32)
+        inputs = (inputs - np.float32(127.5)) / np.float32(128)
+        return np.ascontiguousarray(np.transpose(inputs, [0, 3, 1, 2]))
+
+    def forward_batch(self, imgs, threshold):
+        """Run the network once on a batch of letterboxed images and decode all anchors at once.
+
+        Args:
+            imgs (list): letterboxed images of the model input size.
+            threshold (float): score threshold.
+
+        Returns:
+            Tuple: per image (scores (M, 1), bboxes (M, 4), kpss (M, 5, 2) or None) of the candidates
+            above the threshold, in the same order forward() produces them.
+        """
+        inputs = self._preprocess_batch(imgs)
+        batch = inputs.shape[0]
+        if not self.dynamic_batch:
+            runs = [self.session.run(self.output_names, {self.input_name: inputs[i:i + 1]})
+                    for i in range(batch)]
+            predictions = [np.stack([run[k] for run in runs]) for k in range(len(self.output_names))]
+        else:
+            predictions = self.session.run(self.output_names, {self.input_name: inputs})
+        # Outputs are either (N, anchors, C) or flattened over the batch as (N * anchors, C).
+        predictions = [p.reshape((batch, -1, p.shape[-1])) for p in predictions]
+
+        input_height = inputs.shape[2]
+        input_width = inputs.shape[3]
+        offset = self._offset
+
+        scores_levels = []
+        bboxes_levels = []
+        kpss_levels = []
+        for idx, stride in enumerate(self._strides):
+            anchor_centers = self._anchor_centers(input_height, input_width, stride)
+            scores_levels.append(predictions[idx][:, :, 0])
+
+            # distance2bbox over (N, anchors, 4) in one broadcast.
+            distance = predictions[idx + offset] * stride
+            bboxes_levels.append(np.stack([
+                anchor_centers[:, 0] - distance[:, :, 0],
+                anchor_centers[:, 1] - distance[:, :, 1],
+                anchor_centers[:, 0] + distance[:, :, 2],
+                anchor_centers[:, 1] + distance[:, :, 3]], axis=-1))
+
+            if self._with_kps:
+                # distance2kps over (N, anchors, 2 * num_kps) in one broadcast.
+                distance = predictions[idx + offset * 2] * stride
+                kpss_levels.append(np.stack([
+                    anchor_centers[:, 0, None] + distance[:, :, 0::2],
+                    anchor_centers[:, 1, None] + distance[:, :, 1::2]], axis=-1))
+
+        scores = np.concatenate(scores_levels, axis=1)
+        bboxes = np.concatenate(bboxes_levels, axis=1)
+        kpss = np.concatenate(kpss_levels, axis=1) if self._with_kps else None
+
+        results = []
+        for i in range(batch):
+            pos_inds = np.where(scores[i] >= threshold)[0]
+            results.append((scores[i, pos_inds][:, None], bboxes[i, pos_inds],
+                            kpss[i, pos_inds] if kpss is not None else None))
+        return results
+
+    def detect_batch(self, imgs, threshold=0.5, input_size=None, max_num=1, metric='default'):
+        """Detect faces in several images with one session run.
+
+        Args:
+            imgs (list): BGR images (sizes may differ).
+            threshold, input_size, max_num, metric: same as detect().
+
+        Returns:
+            list: (det, kpss) per image, same as calling detect() on each image.
+        """
+        if len(imgs) == 0:
+            return []
+        input_size = self.input_size if input_size is None else input_size
+
+        letterboxed = [self._letterbox(img, input_size) for img in imgs]
+        candidates = self.forward_batch([det_img for det_img, _ in letterboxed], threshold)
+
+        return [self._postprocess(scores, bboxes, kpss, det_scale, img.shape, max_num, metric)
+                for img, (_, det_scale), (scores, bboxes, kpss) in zip(imgs, letterboxed, candidates)]
+
     def visualize(self, image, results, box_color=(0, 255, 0), text_color=(0, 0, 0)):
         """Visualize the detection results.
 
@@ -4,17 +4,17 @@ import json
 import numpy as np
 
 from audio_feedback.extract_audio import extract_audio_from_video
-from audio_feedback.analyze_audio import analyze_audio_features, analyze_audio_segment
+from audio_feedback.audio_context import AudioContext
+from audio_feedback.analyze_audio import analyze_audio_features
+from audio_feedback.feature_tracks import FeatureTracks
+from audio_feedback.interval_index import TimestampIndex
 from audio_feedback.stuttering_detector import detect_stuttering
 from audio_feedback.feedback_generator import generate_audio_feedback
-from audio_feedback.volume_detector import detect_volume_anomalies_by_sentence
+from audio_feedback.volume_detector import analyze_sentence_volume
 from audio_feedback.utils import (
     generate_analysis_id,
     save_feedback_to_json,
     convert_rms_to_db,
-    get_stutter_words_at_timestamp,
-    find_full_sentence,
-    get_sentence_timestamps,
     convert_numpy_to_python_types
 )
 
@@ -28,12 +28,14 @@ def main():
     print("=== 1. 오디오 추출 중 ===")
     start = time.time()
     extract_audio_from_video(input_video_path, extracted_audio_path)
+    # WAV는 여기서 한 번만 디코딩하고, 이후 단계는 모두 같은 버퍼를 공유합니다.
+    audio = AudioContext.from_file(extracted_audio_path)
     end = time.time()
     print(f"[✓] 소요 시간: {end - start:.2f}초")
 
     print("=== 2. 오디오 분석 중 (전체) ===")
     start = time.time()
-    features = analyze_audio_features(extracted_audio_path)
+    features = analyze_audio_features(audio)
     end = time.time()
     print(f"[✓] 소요 시간: {end - start:.2f}초")
     
@@ -48,67 +50,56 @@ def main():
     
     print("=== 3. 오디오 분석 중 (45초 구간별) ===")
     start = time.time()
-    # 45초 간격으로 반복
-    for i in range(0, int(total_duration), segment_duration):
-        segment_start = i
-        segment_end = min(i + segment_duration, total_duration)
-        if segment_end - segment_start > 0:
-            segment_analysis = analyze_audio_segment(
-                extracted_audio_path,
-                segment_start,
-                segment_end,
-                features['word_timestamps']
-            )
-            # 말속도 세그먼트 데이터 저장
-            speed_segments.append({
-                "start_time_sec": round(float(segment_analysis.get("start_time_sec", 0)), 2),
-                "end_time_sec": round(float(segment_analysis.get("end_time_sec", 0)), 2),
-                "value": round(float(segment_analysis.get("speaking_rate_wpm", 0)), 2)
-            })
-            # 피치 세그먼트 데이터 저장
-            pitch_segments.append({
-                "start_time_sec": round(float(segment_analysis.get("start_time_sec", 0)), 2),
-                "end_time_sec": round(float(segment_analysis.get("end_time_sec", 0)), 2),
-                "value": round(float(segment_analysis.get("avg_pitch_hz", 0)), 2)
-            })
+    # 프레임 트랙 누적합을 한 번 만들고, 45초 구간마다 상수 시간으로 조회합니다.
+    tracks = FeatureTracks.from_features(features, audio.num_samples, sr=audio.sr, hop_length=512)
+    for segment_analysis in tracks.fixed_windows(segment_duration, total_duration):
+        # 말속도 세그먼트 데이터 저장
+        speed_segments.append({
+            "start_time_sec": round(float(segment_analysis.get("start_time_sec", 0)), 2),
+            "end_time_sec": round(float(segment_analysis.get("end_time_sec", 0)), 2),
+            "value": round(float(segment_analysis.get("speaking_rate_wpm", 0)), 2)
+        })
+        # 피치 세그먼트 데이터 저장
+        pitch_segments.append({
+            "start_time_sec": round(float(segment_analysis.get("start_time_sec", 0)), 2),
+            "end_time_sec": round(float(segment_analysis.get("end_time_sec", 0)), 2),
+            "value": round(float(segment_analysis.get("avg_pitch_hz", 0)), 2)
+        })
     end = time.time()
     print(f"[✓] 소요 시간: {end - start:.2f}초")
 
     print("=== 4. 말더듬 감지 중 ===")
     start = time.time()
-    stutter_results = detect_stuttering(extracted_audio_path)
+    # 전체 분석에서 계산한 RMS 프레임을 재사용합니다.
+    stutter_results = detect_stuttering(audio, rms_frames=features['rms_frames'])
     end = time.time()
     print(f"[✓] 소요 시간: {end - start:.2f}초")
 
     print("=== 5. 피드백 생성 중 ===")
     audio_feedback_results = generate_audio_feedback(features, avg_rms_db)
     
-    volume_anomalies = detect_volume_anomalies_by_sentence(
-        features['rms_frames'], 
-        avg_rms_db, 
-        sr=16000, 
-        hop_length=512, 
-        word_timestamps=features['word_timestamps']
+    # 전사 단계에서 한 번 분할한 문장 목록을 음량 분석과 말더듬 문장 찾기에 함께 씁니다.
+    sentences_with_timestamps = features['sentences']
+
+    # 문장별 dB를 누적합으로 한 번에 계산하고, 이상 문장과 전체 문장 dB 시계열을 함께 받습니다.
+    sentence_volume = analyze_sentence_volume(
+        features['rms_frames'],
+        avg_rms_db,
+        sr=16000,
+        hop_length=512,
+        sentences=sentences_with_timestamps
     )
-    
-    sentences_with_timestamps = get_sentence_timestamps(features['word_timestamps'])
+    volume_anomalies = sentence_volume["anomalies"]
     
     stutter_count = stutter_results['stutter_count']
     stuttering_timestamps = stutter_results['stuttering_timestamps']
     stutter_feedback = stutter_results['stuttering_feedback']
     
+    # 단어/문장 구간 인덱스를 한 번 만들고 말더듬 구간마다 bisect로 찾습니다.
+    timestamp_index = TimestampIndex(features['word_timestamps'], sentences_with_timestamps, features['transcript'])
     stutter_by_sentence = {}
     for timestamp in stuttering_timestamps:
-        stutter_words = get_stutter_words_at_timestamp(timestamp, features['word_timestamps'])
-        
-        full_sentence = ""
-        for sentence in sentences_with_timestamps:
-            if timestamp['start'] >= sentence['start'] and timestamp['end'] <= sentence['end']:
-                full_sentence = sentence['text']
-                break
-        
-        if not full_sentence:
-            full_sentence = find_full_sentence(stutter_words, features['transcript'])
+        stutter_words, full_sentence = timestamp_index.attribute(timestamp)
 
         if full_sentence not in stutter_by_sentence:
             stutter_by_sentence[full_sentence] = {
@@ -149,7 +140,8 @@ def main():
                 "feedback": audio_feedback_results.get("volume_feedback", ""),
                 "decibels": round(float(avg_rms_db), 2),
                 "level": audio_feedback_results.get("volume_level", ""),
-                "volume_anomalies": volume_anomalies
+                "volume_anomalies": volume_anomalies,
+                "sentence_decibels": sentence_volume["sentence_decibels"]
             },
             "stutter": {
                 "feedback": stutter_feedback,
@@ -5,103 +5,250 @@ from face_detection import FaceDetector
 from mark_detection import MarkDetector
 from pose_estimation import PoseEstimator
 from utils import refine
+from video_sampler import open_sampler, FrameSampler, DEFAULT_SAMPLE_SEC
+from video_pipeline import VideoPipeline, merge_stats, record_stats
 import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 
-def run(video_path):
-    cap = cv2.VideoCapture(video_path)
-    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+# 어깨 너비 대비 손목 이동량이 이 값을 넘으면 팔 움직임으로 셉니다.
+THRESHOLD = 0.3
+# 샤드 하나에 배정할 최소 샘플 수 (이보다 짧은 영상은 순차 처리)
+MIN_SHARD_SAMPLES = 20
 
-    face_detector = FaceDetector("assets/face_detector.onnx")
-    mark_detector = MarkDetector("assets/face_landmarks.onnx")
-    pose_estimator = PoseEstimator(frame_width, frame_height)
+def _env_max_side():
+    value = os.getenv("VIDEO_MAX_SIDE")
+    return int(value) if value else None
 
-    picked_frame = 0
-    head_down = 0
+def _env_workers():
+    value = os.getenv("VIDEO_WORKERS")
+    return int(value) if value else None
 
-    mp_pose = mp.solutions.pose
-    pose_a = mp_pose.Pose()
+def _env_pipelined():
+    return os.getenv("VIDEO_PIPELINE") == "1"
 
-    THRESHOLD = 0.3
-    prev_landmarks = None
-    frame_count = 0
-    movement_detected = 0
-    total_checked = 0
+def _env_face_batch():
+    return int(os.getenv("VIDEO_FACE_BATCH", 1))
 
-    # 전체 프레임 수(일부 코덱/스트림은 -1일 수 있음)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    total_steps = (total_frames // 15) if total_frames > 0 else None
-    progress = tqdm(total=total_steps, desc="분석", unit="step", leave=True)
 
-    try:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
+class PostureCounter:
+    """
+    샘플 프레임별 시선/팔 관측 카운터.
+    팔 움직임은 직전 관측과의 차이로 세므로, 구간의 첫/마지막 팔 관측을 함께 보관해 두고
+    샤드별 카운터를 시간 순서대로 merge하면 경계의 한 쌍까지 포함해 전체를 한 번에 센 것과 같아집니다.
+    """
+
+    def __init__(self):
+        self.picked_frame = 0
+        self.head_down = 0
+        self.movement_detected = 0
+        self.total_checked = 0
+        self.first_arm = None  # (rel_lw, rel_rw, shoulder_dist)
+        self.last_arm = None
+
+    def add_face(self, is_head_down):
+        self.picked_frame += 1
+        if is_head_down:
+            self.head_down += 1
+
+    def add_arm(self, arm):
+        if self.last_arm is None:
+            self.first_arm = arm
+        else:
+            self._check_movement(self.last_arm, arm)
+        self.last_arm = arm
+
+    def _check_movement(self, prev_arm, arm):
+        prev_rel_lw, prev_rel_rw, _ = prev_arm
+        rel_lw, rel_rw, shoulder_dist = arm
+        left_movement = np.linalg.norm(rel_lw - prev_rel_lw) / shoulder_dist
+        right_movement = np.linalg.norm(rel_rw - prev_rel_rw) / shoulder_dist
+        avg_movement = (left_movement + right_movement) / 2
+        self.total_checked += 1
+        if avg_movement > THRESHOLD:
+            self.movement_detected += 1
+
+    def merge(self, other):
+        """바로 다음 시간 구간의 카운터를 더합니다."""
+        self.picked_frame += other.picked_frame
+        self.head_down += other.head_down
+        self.movement_detected += other.movement_detected
+        self.total_checked += other.total_checked
+        if other.first_arm is not None:
+            if self.last_arm is None:
+                self.first_arm = other.first_arm
+            else:
+                # 샤드 경계: 앞 샤드의 마지막 관측과 이 샤드의 첫 관측 사이 움직임
+                self._check_movement(self.last_arm, other.first_arm)
+            self.last_arm = other.last_arm
+        return self
+
+    def ratios(self):
+        head_down_ratio = self.head_down / self.picked_frame if self.picked_frame > 0 else 0.0
+        arm_move_ratio = self.movement_detected / self.total_checked if self.total_checked > 0 else 0.0
+        return head_down_ratio, arm_move_ratio
+
+
+class FrameAnalyzer:
+    """
+    샘플 프레임 하나에서 팔(mediapipe pose)과 시선(SCRFD 얼굴 + 랜드마크 + solvePnP)을 따로 계산합니다.
+    두 단계가 서로 독립이라 순차 처리와 파이프라인(VideoPipeline의 pose/face 분기) 모두 이 메서드를 씁니다.
+    """
+
+    def __init__(self, sampler, num_threads=None):
+        self.sampler = sampler
+        # 검출은 작업 해상도 프레임에서 하고, 얼굴 랜드마크는 원본 좌표로 되돌려 원본 크기 기준 카메라 행렬로 자세를 풉니다.
+        self.frame_width = sampler.frame_width
+        self.frame_height = sampler.frame_height
+        self.face_detector = FaceDetector("assets/face_detector.onnx", num_threads)
+        self.mark_detector = MarkDetector("assets/face_landmarks.onnx", num_threads)
+        self.pose_estimator = PoseEstimator(sampler.width, sampler.height)
+        self.mp_pose = mp.solutions.pose
+        self.pose_a = self.mp_pose.Pose()
+
+    def arm(self, frame):
+        """(어깨 기준 왼/오른 손목 상대 위치, 어깨 너비). 사람이 검출되지 않으면 None"""
+        mp_pose = self.mp_pose
+        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = self.pose_a.process(image_rgb)
+        if not results.pose_landmarks:
+            return None
+
+        lm = results.pose_landmarks.landmark
+        lw = np.array([lm[mp_pose.PoseLandmark.LEFT_WRIST].x,
+                       lm[mp_pose.PoseLandmark.LEFT_WRIST].y,
+                       lm[mp_pose.PoseLandmark.LEFT_WRIST].z])
+        rw = np.array([lm[mp_pose.PoseLandmark.RIGHT_WRIST].x,
+                       lm[mp_pose.PoseLandmark.RIGHT_WRIST].y,
+                       lm[mp_pose.PoseLandmark.RIGHT_WRIST].z])
+        ls = np.array([lm[mp_pose.PoseLandmark.LEFT_SHOULDER].x,
+                       lm[mp_pose.PoseLandmark.LEFT_SHOULDER].y,
+                       lm[mp_pose.PoseLandmark.LEFT_SHOULDER].z])
+        rs = np.array([lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].x,
+                       lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].y,
+                       lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].z])
+
+        rel_lw = lw - ls
+        rel_rw = rw - rs
+
+        shoulder_dist = np.linalg.norm(ls - rs)
+        if shoulder_dist < 1e-6:
+            shoulder_dist = 1e-6
+        return rel_lw, rel_rw, shoulder_dist
+
+    def head_down(self, frame):
+        """고개를 숙였으면 True, 아니면 False. 얼굴이 검출되지 않으면 None"""
+        faces, _ = self.face_detector.detect(frame, 0.6)
+        return self._head_down_from_faces(frame, faces)
+
+    def head_down_batch(self, frames):
+        """여러 프레임의 head_down. SCRFD는 한 번의 세션 실행으로 모든 프레임을 검출합니다."""
+        detections = self.face_detector.detect_batch(frames, 0.6)
+        return [self._head_down_from_faces(frame, faces) for frame, (faces, _) in zip(frames, detections)]
+
+    def _head_down_from_faces(self, frame, faces):
+        if len(faces) == 0:
+            return None
+        face = refine(faces, self.frame_width, self.frame_height, 0.15)[0]
+        x1, y1, x2, y2 = face[:4].astype(int)
+        patch = frame[y1:y2, x1:x2]
+        marks = self.mark_detector.detect([patch])[0].reshape([68, 2])
+        marks *= (x2 - x1)
+        marks[:, 0] += x1
+        marks[:, 1] += y1
+        marks = self.sampler.to_source(marks)
+        pose_f = self.pose_estimator.solve(marks)
+        rotation_matrix, _ = cv2.Rodrigues(pose_f[0])
+        pitch_rad = math.atan2(rotation_matrix[2,1], rotation_matrix[2,2])
+        pitch_deg = np.degrees(pitch_rad)
+        return pitch_deg < -18
+
+    def close(self):
+        try:
+            self.pose_a.close()
+        except Exception:
+            pass
+
+
+def _windows(sampler, size):
+    window = []
+    for _, frame in sampler:
+        window.append(frame)
+        if len(window) == size:
+            yield window
+            window = []
+    if window:
+        yield window
 
-            frame_count += 1
-            if frame_count % 15 != 0:   # 샘플링: 15프레임당 1스텝
-                continue
 
+def _observations(sampler, analyzer, pipelined, face_batch=1, pipeline_stats=None):
+    # (팔, 시선) 관측을 프레임 순서대로 냅니다.
+    # 순차 처리: 기존처럼 사람이 검출된 프레임에서만 얼굴을 봅니다.
+    # 파이프라인: 두 분기를 동시에 돌리므로 얼굴은 모든 샘플에서 계산하고, 사람이 없는 프레임 결과는 집계에서 버립니다.
+    # face_batch: 2 이상이면 샘플 프레임을 이 개수씩 모아 SCRFD를 한 번에 실행합니다.
+    # pipeline_stats: 리스트를 주면 파이프라인이 끝날 때 단계/큐 통계를 추가합니다.
+    if pipelined:
+        face_fn = analyzer.head_down_batch if face_batch > 1 else analyzer.head_down
+        pipeline = VideoPipeline(sampler, analyzer.arm, face_fn,
+                                 queue_size=int(os.getenv("VIDEO_PIPELINE_QUEUE", 8)),
+                                 batch_sizes={"face": face_batch} if face_batch > 1 else None)
+        try:
+            for _, arm, head_down in pipeline:
+                yield arm, head_down
+        finally:
+            stats = pipeline.stats()
+            if pipeline_stats is not None:
+                pipeline_stats.append(stats)
+            print(f"[video pipeline] {stats}")
+        return
+    if face_batch > 1:
+        for window in _windows(sampler, face_batch):
+            arms = [analyzer.arm(frame) for frame in window]
+            with_person = [frame for frame, arm in zip(window, arms) if arm is not None]
+            head_downs = iter(analyzer.head_down_batch(with_person))
+            for arm in arms:
+                yield arm, (next(head_downs) if arm is not None else None)
+        return
+    for _, frame in sampler:
+        arm = analyzer.arm(frame)
+        yield arm, (analyzer.head_down(frame) if arm is not None else None)
+
+
+def _analyze_samples(video_path, sample_sec=DEFAULT_SAMPLE_SEC, max_side=None, first_sample=1, stop_sample=None,
+                     show_progress=True, num_threads=None, pipelined=False, face_batch=1):
+    # 샘플 번호 [first_sample, stop_sample) 구간을 분석해 (PostureCounter, 파이프라인 통계)를 반환합니다.
+    # 통계는 pipelined일 때만 있고(아니면 None), 샤드 워커에서는 부모 프로세스가 모아 기록합니다.
+    # num_threads: 워커 프로세스에서 코어를 나눠 쓰도록 OpenCV/onnxruntime 스레드 수를 제한합니다.
+    # pipelined: 디코딩/pose/얼굴 단계를 스레드 파이프라인으로 겹쳐 실행합니다.
+    # face_batch: 얼굴 검출을 몇 프레임씩 묶어 실행할지 (1이면 프레임마다)
+    if num_threads:
+        cv2.setNumThreads(num_threads)
+    sampler = open_sampler(video_path, sample_sec, max_side, first_sample, stop_sample)
+    analyzer = FrameAnalyzer(sampler, num_threads)
+    if not analyzer.face_detector.dynamic_batch:
+        # 고정 배치 모델은 forward_batch도 이미지마다 실행하므로 묶는 비용만 늘어납니다.
+        face_batch = 1
+    counter = PostureCounter()
+    stats = []
+
+    # 전체 샘플 수(프레임 수를 읽지 못하는 스트림이면 None)
+    total_steps = sampler.expected_samples()
+    progress = tqdm(total=total_steps, desc="분석", unit="step", leave=True, disable=not show_progress)
+
+    try:
+        for arm, head_down in _observations(sampler, analyzer, pipelined, face_batch, stats):
             # 진행률 1스텝 업데이트
-            if total_steps is not None:
+            if total_steps is not None and progress.n < total_steps:
                 progress.update(1)
 
-            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = pose_a.process(image_rgb)
-
-            if results.pose_landmarks:
-                lm = results.pose_landmarks.landmark
-                lw = np.array([lm[mp_pose.PoseLandmark.LEFT_WRIST].x,
-                               lm[mp_pose.PoseLandmark.LEFT_WRIST].y,
-                               lm[mp_pose.PoseLandmark.LEFT_WRIST].z])
-                rw = np.array([lm[mp_pose.PoseLandmark.RIGHT_WRIST].x,
-                               lm[mp_pose.PoseLandmark.RIGHT_WRIST].y,
-                               lm[mp_pose.PoseLandmark.RIGHT_WRIST].z])
-                ls = np.array([lm[mp_pose.PoseLandmark.LEFT_SHOULDER].x,
-                               lm[mp_pose.PoseLandmark.LEFT_SHOULDER].y,
-                               lm[mp_pose.PoseLandmark.LEFT_SHOULDER].z])
-                rs = np.array([lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].x,
-                               lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].y,
-                               lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].z])
-
-                rel_lw = lw - ls
-                rel_rw = rw - rs
-
-                shoulder_dist = np.linalg.norm(ls - rs)
-                if shoulder_dist < 1e-6:
-                    shoulder_dist = 1e-6
-
-                faces, _ = face_detector.detect(frame, 0.6)
+            if arm is not None:
                 # 얼굴
-                if len(faces) > 0:
-                    picked_frame += 1
-                    face = refine(faces, frame_width, frame_height, 0.15)[0]
-                    x1, y1, x2, y2 = face[:4].astype(int)
-                    patch = frame[y1:y2, x1:x2]
-                    marks = mark_detector.detect([patch])[0].reshape([68, 2])
-                    marks *= (x2 - x1)
-                    marks[:, 0] += x1
-                    marks[:, 1] += y1
-                    pose_f = pose_estimator.solve(marks)
-                    rotation_matrix, _ = cv2.Rodrigues(pose_f[0])
-                    pitch_rad = math.atan2(rotation_matrix[2,1], rotation_matrix[2,2])
-                    pitch_deg = np.degrees(pitch_rad)
-                    if pitch_deg < -18:
-                        head_down += 1
-
+                if head_down is not None:
+                    counter.add_face(head_down)
                 # 팔
-                if prev_landmarks is not None:
-                    prev_rel_lw, prev_rel_rw = prev_landmarks
-                    left_movement = np.linalg.norm(rel_lw - prev_rel_lw) / shoulder_dist
-                    right_movement = np.linalg.norm(rel_rw - prev_rel_rw) / shoulder_dist
-                    avg_movement = (left_movement + right_movement) / 2
-                    total_checked += 1
-                    if avg_movement > THRESHOLD:
-                        movement_detected += 1
-
-                prev_landmarks = [rel_lw, rel_rw]
+                counter.add_arm(arm)
 
         # total_frames을 못 읽은 경우, 마지막에 대략 완료 표시
         if total_steps is None:
@@ -112,30 +259,91 @@ def run(video_path):
             if remaining > 0:
                 progress.update(remaining)
 
-        head_down_ratio = head_down / picked_frame if picked_frame > 0 else 0.0
-        arm_move_ratio = movement_detected / total_checked if total_checked > 0 else 0.0
-
-        from videoFG import generate_posture_feedback
-        gaze_feedback, gaze_level, gesture_feedback, gesture_level, summary = generate_posture_feedback(
-            head_down_ratio, arm_move_ratio
-        )
-
-        report = {
-            "body_movement": {"gestureFeedback": gesture_feedback, "value": gesture_level},
-            "gaze": {"gazeFeedback": gaze_feedback, "value": gaze_level},
-            "content_summary": summary
-        }
-        return report
+        return counter, (stats[0] if stats else None)
 
     finally:
         progress.close()
-        cap.release()
-        try:
-            pose_a.close()
-        except Exception:
-            pass
+        sampler.close()
+        analyzer.close()
+
+
+def plan_shards(total_samples, shards):
+    """샘플 번호 1..total_samples를 연속된 [first, stop) 구간 shards개로 나눕니다. 마지막 구간은 끝까지 읽습니다."""
+    bounds = [1 + (total_samples * i) // shards for i in range(shards + 1)]
+    ranges = [(first, stop) for first, stop in zip(bounds[:-1], bounds[1:]) if stop > first]
+    if ranges:
+        ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def _run_sharded(video_path, sample_sec, max_side, workers, pipelined=False, face_batch=1):
+    # 영상을 시간 구간(샤드)으로 나눠 워커 프로세스마다 자체 FaceDetector/MarkDetector/Pose로 분석하고
+    # 카운터를 시간 순서대로 합칩니다. 파이프라인 통계도 샤드별로 받아 합쳐서 기록합니다.
+    with FrameSampler(video_path, sample_sec) as probe:
+        total_samples = probe.total_samples()
+    if total_samples is None:
+        return None
+    shards = min(workers, total_samples // MIN_SHARD_SAMPLES)
+    if shards < 2:
+        return None
+
+    num_threads = max(1, (os.cpu_count() or 1) // shards)
+    ranges = plan_shards(total_samples, shards)
+    # mediapipe/onnxruntime 세션은 fork 후 공유하지 않도록 spawn 프로세스에서 새로 만듭니다.
+    with ProcessPoolExecutor(max_workers=shards, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_analyze_samples, video_path, sample_sec, max_side, first, stop, False, num_threads,
+                               pipelined, face_batch)
+                   for first, stop in ranges]
+        counter = PostureCounter()
+        shard_stats = []
+        for future in tqdm(futures, desc="분석", unit="shard", leave=True):
+            shard_counter, stats = future.result()
+            counter.merge(shard_counter)
+            shard_stats.append(stats)
+    if pipelined:
+        record_stats(merge_stats(shard_stats))
+    return counter
+
+
+def run(video_path, sample_sec=DEFAULT_SAMPLE_SEC, max_side=None, workers=None, pipelined=None, face_batch=None):
+    # sample_sec: 샘플 간격(초). 프레임 수가 아니라 시간으로 정하므로 60fps 영상도 15fps 영상과 같은 수의 프레임만 분석합니다.
+    # 샘플 사이 프레임은 grab()으로 건너뛰어 디코딩 결과의 BGR 변환/복사를 하지 않습니다.
+    # max_side: 작업 해상도의 긴 변(px). 지정하면(또는 VIDEO_MAX_SIDE) ffmpeg가 샘플 프레임만 골라 이 크기로 줄여 내보내므로
+    #           디코딩 출력/색 변환/검출 비용이 업로드 해상도가 아니라 작업 해상도를 따릅니다.
+    # workers: 2 이상이면(또는 VIDEO_WORKERS) 영상을 시간 구간으로 나눠 프로세스 풀에서 병렬 분석합니다.
+    # pipelined: True면(또는 VIDEO_PIPELINE=1) 디코딩 스레드와 pose/얼굴 분기 스레드를 bounded queue로 연결해 겹쳐 실행하고
+    #            단계별 사용률과 큐 깊이를 기록합니다. (video_pipeline.pipeline_stats)
+    # face_batch: 얼굴 검출(SCRFD)을 묶어 실행할 샘플 프레임 수 (기본 VIDEO_FACE_BATCH 또는 1, 1이면 프레임마다)
+    #             배치 차원이 고정(1)인 얼굴 검출 모델이면 묶어도 실행 횟수가 같으므로 프레임마다 실행합니다.
+    max_side = max_side if max_side is not None else _env_max_side()
+    workers = workers if workers is not None else _env_workers()
+    pipelined = pipelined if pipelined is not None else _env_pipelined()
+    face_batch = face_batch if face_batch is not None else _env_face_batch()
+
+    counter = None
+    if workers and workers > 1:
+        counter = _run_sharded(video_path, sample_sec, max_side, workers, pipelined, face_batch)
+    if counter is None:
+        counter, stats = _analyze_samples(video_path, sample_sec, max_side, pipelined=pipelined,
+                                          face_batch=face_batch)
+        if stats is not None:
+            record_stats(merge_stats([stats]))
+
+    head_down_ratio, arm_move_ratio = counter.ratios()
+
+    from videoFG import generate_posture_feedback
+    gaze_feedback, gaze_level, gesture_feedback, gesture_level, summary = generate_posture_feedback(
+        head_down_ratio, arm_move_ratio
+    )
+
+    report = {
+        "body_movement": {"gestureFeedback": gesture_feedback, "value": gesture_level},
+        "gaze": {"gazeFeedback": gaze_feedback, "value": gaze_level},
+        "content_summary": summary
+    }
+    return report
 
 if __name__ == "__main__":
     video_path = "C:/Users/vmfpel/Desktop/spAIk_ai/spAIk_audio_ai-main/sample_input/123.mp4"
     run(video_path)
-    print("비디오 분석이 완료되었습니다.")
\ No newline at end of file
+    print("비디오 분석이 완료되었습니다.")
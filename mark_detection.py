@@ -9,16 +9,20 @@ import onnxruntime as ort
 class MarkDetector:
     """Facial landmark detector by Convolutional Neural Network"""
 
-    def __init__(self, model_file):
+    def __init__(self, model_file, num_threads=None):
         """Initialize a mark detector.
 
         Args:
             model_file (str): ONNX model path.
+            num_threads (int, optional): intra-op threads for the session. None uses all cores.
         """
         assert os.path.exists(model_file), f"File not found: {model_file}"
         self._input_size = 128
-        self.model = ort.InferenceSession(model_file, providers=["CPUExecutionProvider"])
-        #self.model = ort.InferenceSession(model_file, providers=["CUDAExecutionProvider", "CPUExecutionProvider"])
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.model = ort.InferenceSession(model_file, sess_options=options, providers=["CPUExecutionProvider"])
+        #self.model = ort.InferenceSession(model_file, sess_options=options, providers=["CUDAExecutionProvider", "CPUExecutionProvider"])
 
     def _preprocess(self, bgrs):
         """Preprocess the inputs to meet the model's needs.
@@ -10,6 +10,7 @@ from werkzeug.datastructures import FileStorage
 # 오디오 추출 및 분석 관련 모듈 임포트 (가상 모듈)
 # 실제 프로젝트에서는 이 파일들이 같은 경로에 있거나 PYTHONPATH에 추가되어 있어야 합니다.
 from audio_feedback.extract_audio import extract_audio_from_video
+from audio_feedback.audio_context import AudioContext
 from audio_feedback.analyze_audio import analyze_audio_features
 from audio_feedback.stuttering_detector import detect_stuttering
 from audio_feedback.feedback_generator import generate_audio_feedback
@@ -51,12 +52,13 @@ def process_video_for_feedback(video_file_path: str, video_id: str) -> dict:
         print("오디오 추출 완료")
 
         # 오디오 분석 (말 속도, 음의 높낮이, 음량) 및 STT를 수행합니다.
-        features = analyze_audio_features(extracted_audio_path)
+        audio = AudioContext.from_file(extracted_audio_path)
+        features = analyze_audio_features(audio)
         transcript = features.get("transcript", "")
         print("오디오 분석 완료")
 
         # 말더듬(멈칫거림) 횟수를 감지합니다.
-        stuttering_analysis_results = detect_stuttering(extracted_audio_path)
+        stuttering_analysis_results = detect_stuttering(audio, rms_frames=features['rms_frames'])
         print("말더듬 분석 완료")
 
         # 오디오 특성들을 종합한 피드백 메시지를 생성합니다.
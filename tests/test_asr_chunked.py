@@ -0,0 +1,111 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from audio_feedback import asr_chunked, asr_whisper
+from audio_feedback.asr_chunked import stitch_results
+from audio_feedback.audio_context import AudioContext
+from audio_feedback.word_timing import add_word_timing
+
+SR = 16000
+
+
+def _segment(start, end, text, avg_logprob=-0.1):
+    # "fast" 프로필(word_timestamps=False)의 Whisper segment: "words" 키가 없습니다.
+    return {"start": start, "end": end, "text": text, "avg_logprob": avg_logprob, "no_speech_prob": 0.0}
+
+
+class FakeDraft(asr_whisper.WhisperBackend):
+    def transcribe(self, audio, **options):
+        return {"segments": [_segment(0.0, 2.0, " clean one"),
+                             _segment(2.0, 4.0, " hard", avg_logprob=-2.0),
+                             _segment(4.0, 6.0, " clean two")]}
+
+
+def test_fast_profile_keeps_escalated_speculative_segments(monkeypatch):
+    calls = []
+
+    def big_model(self, audio, **options):
+        calls.append((len(audio) / float(SR), options["word_timestamps"]))
+        return {"segments": [_segment(0.0, len(audio) / float(SR), " BIG MODEL TEXT")]}
+
+    monkeypatch.setattr(asr_whisper.WhisperBackend, "transcribe", big_model)
+    backend = asr_whisper.SpeculativeBackend("base", draft_size="tiny")
+    backend.draft = FakeDraft("tiny")
+    samples = np.full(SR * 6, 0.1, dtype=np.float32)
+
+    text, duration, words = asr_whisper.transcribe_audio(samples, backend=backend, profile="fast",
+                                                         use_cache=False, batched=False)
+    assert calls == [(3.0, False)]
+    assert text == " clean one BIG MODEL TEXT clean two"
+    assert [w["word"] for w in words] == [" clean", " one", " BIG", " MODEL", " TEXT", " clean", " two"]
+
+
+def test_fast_profile_keeps_first_segment_after_overlapped_cut():
+    # 쉼이 아닌 10초 지점에서 잘라 앞뒤 청크가 0.5초씩 겹치는 경우
+    chunks = [(0.0, 10.5, 0.0, 10.0), (9.5, 20.0, 10.0, 20.0)]
+    results = [
+        {"segments": [_segment(0.0, 6.0, " 첫 문장"), _segment(6.0, 10.5, " 둘째 문장")]},
+        {"segments": [_segment(0.0, 3.0, " 셋째 문장"), _segment(3.0, 10.5, " 넷째 문장")]},
+    ]
+    result = stitch_results(list(zip(chunks, results)))
+    assert result["text"] == " 첫 문장 둘째 문장 셋째 문장 넷째 문장"
+    assert [segment["start"] for segment in result["segments"]] == [0.0, 6.0, 9.5, 12.5]
+
+    add_word_timing(result, "energy", np.full(20 * SR // 512 + 1, 0.1))
+    assert [w["word"] for s in result["segments"] for w in s["words"]][-2:] == [" 넷째", " 문장"]
+
+
+class _InlineFuture:
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+class _RecordingPool:
+    created = []
+
+    def __init__(self, max_workers, **kwargs):
+        self.max_workers = max_workers
+        self.shut_down = False
+        self.submitted = []
+        _RecordingPool.created.append(self)
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+        return _InlineFuture(fn(*pickle.loads(pickle.dumps(args))))
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+@pytest.fixture
+def recording_pool(monkeypatch):
+    _RecordingPool.created = []
+    monkeypatch.setattr(asr_chunked, "ProcessPoolExecutor", _RecordingPool)
+    monkeypatch.setattr(asr_chunked, "_pools", {})
+    return _RecordingPool
+
+
+def test_pool_per_worker_count_is_kept(recording_pool):
+    two = asr_chunked._get_pool(2)
+    three = asr_chunked._get_pool(3)
+    assert asr_chunked._get_pool(2) is two
+    assert two is not three
+    assert not any(pool.shut_down for pool in recording_pool.created)
+
+
+class DeviceEcho(asr_whisper.WhisperBackend):
+    def transcribe(self, audio, **options):
+        text = f" {self.model_size}/{self.device}/{self.precision}"
+        return {"segments": [_segment(0.0, len(audio) / float(SR), text)]}
+
+
+def test_chunk_workers_get_the_callers_backend_settings(recording_pool):
+    audio = AudioContext(np.full(SR * 4, 0.1, dtype=np.float32))
+    result = asr_chunked.transcribe_chunked(audio, DeviceEcho("small", device="cuda", precision="fp16"), workers=2,
+                                            word_timestamps=False)
+    assert result["text"] == " small/cuda/fp16"
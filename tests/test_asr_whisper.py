@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from audio_feedback import asr_whisper
+from audio_feedback.audio_context import AudioContext, as_audio_context
+
+SR = 16000
+
+
+def _result(duration):
+    return {
+        "text": " 안녕하세요",
+        "segments": [{
+            "start": 0.0, "end": duration, "text": " 안녕하세요",
+            "words": [{"word": " 안녕하세요", "start": 0.0, "end": duration}],
+        }],
+    }
+
+
+class FakeBackend(asr_whisper.WhisperBackend):
+    name = "fake"
+
+    def __init__(self):
+        super().__init__("tiny", device="cpu", precision="fp32")
+        self.inputs = []
+
+    def transcribe(self, audio, **options):
+        self.inputs.append(audio)
+        return _result(len(audio) / float(SR))
+
+
+@pytest.fixture
+def samples():
+    return np.random.RandomState(0).uniform(-0.1, 0.1, SR * 4).astype(np.float32)
+
+
+def test_as_audio_context_wraps_ndarray(samples):
+    context = as_audio_context(samples)
+    assert isinstance(context, AudioContext)
+    assert np.array_equal(context.samples, samples)
+
+
+def test_vad_branch_accepts_ndarray(samples):
+    backend = FakeBackend()
+    text, duration, words = asr_whisper.transcribe_audio(samples, backend=backend, speech_regions=[(1.0, 3.0)],
+                                                         use_cache=False, batched=False)
+    assert text == " 안녕하세요"
+    assert len(backend.inputs[0]) == 2 * SR
+    assert words[0]["start"] == pytest.approx(1.0)
+
+
+def test_chunked_branch_accepts_ndarray(samples, monkeypatch):
+    seen = {}
+
+    def fake_chunked(audio, backend, workers, **options):
+        seen["audio"] = audio
+        return _result(audio.duration)
+
+    monkeypatch.setattr(asr_whisper, "transcribe_chunked", fake_chunked)
+    text, duration, _ = asr_whisper.transcribe_audio(samples, backend=FakeBackend(), workers=2,
+                                                     use_cache=False, batched=False)
+    assert isinstance(seen["audio"], AudioContext)
+    assert np.array_equal(seen["audio"].samples, samples)
+    assert duration == pytest.approx(4.0)
+
+
+def test_batched_branch_accepts_ndarray(samples, monkeypatch):
+    seen = {}
+
+    def fake_batched(audio, backend, word_timestamps=True, **options):
+        seen["audio"] = audio
+        return _result(audio.duration)
+
+    monkeypatch.setattr(asr_whisper, "transcribe_batched", fake_batched)
+    text, duration, _ = asr_whisper.transcribe_audio(samples, backend=FakeBackend(), use_cache=False, batched=True)
+    assert isinstance(seen["audio"], AudioContext)
+    assert np.array_equal(seen["audio"].samples, samples)
+    assert duration == pytest.approx(4.0)
+
+
+def _word_segment(start, end, words, avg_logprob=-0.1):
+    step = (end - start) / len(words)
+    return {
+        "start": start, "end": end, "text": "".join(words),
+        "avg_logprob": avg_logprob, "no_speech_prob": 0.0,
+        "words": [{"word": word, "start": start + i * step, "end": start + (i + 1) * step}
+                  for i, word in enumerate(words)],
+    }
+
+
+class FakeDraft(asr_whisper.WhisperBackend):
+    def transcribe(self, audio, **options):
+        return {"segments": [_word_segment(0.0, 2.0, [" 안녕", " 하세요"]),
+                             _word_segment(2.0, 4.0, [" 초안", " 오류"], avg_logprob=-2.0),
+                             _word_segment(4.0, 6.0, [" 감사", " 합니다"])]}
+
+
+def test_speculative_splices_escalated_text(monkeypatch):
+    sliced = []
+
+    def big_model(self, audio, **options):
+        # 앞뒤 0.5초 여유를 붙인 구간을 받습니다. 여유 구간의 단어는 이웃 초안 단어와 겹칩니다.
+        sliced.append(len(audio) / float(SR))
+        segment = _word_segment(0.0, 3.0, [" 하세요", " 큰", " 모델", " 감사"])
+        for word, (start, end) in zip(segment["words"], [(0.0, 0.5), (0.5, 1.5), (1.5, 2.5), (2.5, 3.0)]):
+            word["start"], word["end"] = start, end
+        return {"segments": [segment]}
+
+    monkeypatch.setattr(asr_whisper.WhisperBackend, "transcribe", big_model)
+    backend = asr_whisper.SpeculativeBackend("base", draft_size="tiny")
+    backend.draft = FakeDraft("tiny")
+
+    result = backend.transcribe(np.zeros(SR * 6, dtype=np.float32), word_timestamps=True)
+    assert sliced == [3.0]
+    assert result["escalated"] == [(2.0, 4.0)]
+    assert result["text"] == " 안녕 하세요 큰 모델 감사 합니다"
+    words = [w for segment in result["segments"] for w in segment["words"]]
+    assert [w["word"] for w in words] == [" 안녕", " 하세요", " 큰", " 모델", " 감사", " 합니다"]
+    assert all(a["end"] <= b["start"] for a, b in zip(words, words[1:]))
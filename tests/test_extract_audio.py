@@ -0,0 +1,14 @@
+from audio_feedback import extract_audio
+
+
+def test_estimate_num_samples_without_ffprobe(monkeypatch):
+    def missing_ffprobe(path):
+        raise FileNotFoundError("ffprobe")
+
+    monkeypatch.setattr(extract_audio.ffmpeg, "probe", missing_ffprobe)
+    assert extract_audio._estimate_num_samples("video.mp4") == 0
+
+
+def test_estimate_num_samples_from_duration(monkeypatch):
+    monkeypatch.setattr(extract_audio.ffmpeg, "probe", lambda path: {"format": {"duration": "1.5"}})
+    assert extract_audio._estimate_num_samples("video.mp4") == 24000
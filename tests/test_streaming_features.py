@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from audio_feedback.audio_context import AudioContext
+from audio_feedback.pitch_tracker import track_pitch
+from audio_feedback.streaming_features import stream_audio_features
+from audio_feedback.stuttering_detector import detect_stuttering
+
+SR = 16000
+
+
+def _speech_like(seconds=6.0):
+    # 유성음(120/220Hz)과 무음이 번갈아 나오고, 끝은 무음으로 끝나는 신호
+    t = np.arange(int(seconds * SR)) / float(SR)
+    signal = np.where(t < 1.5, 0.3 * np.sin(2 * np.pi * 120 * t), 0.0)
+    signal += np.where((t >= 2.2) & (t < 4.0), 0.2 * np.sin(2 * np.pi * 220 * t), 0.0)
+    signal += np.random.RandomState(0).normal(0, 0.001, len(t))
+    return signal.astype(np.float32)
+
+
+def _chunks(samples, sizes):
+    start = 0
+    i = 0
+    while start < len(samples):
+        size = sizes[i % len(sizes)]
+        yield samples[start:start + size]
+        start += size
+        i += 1
+
+
+@pytest.mark.parametrize("sizes", [[SR * 10], [1000, 3333, 777], [512]])
+def test_streamed_features_match_batch(sizes):
+    samples = _speech_like()
+    audio = AudioContext(samples)
+    summary = list(stream_audio_features(_chunks(samples, sizes)))[-1]["summary"]
+
+    batch_rms = audio.rms(frame_length=2048, hop_length=512)
+    assert summary["duration_sec"] == pytest.approx(audio.duration)
+    assert len(summary["rms_frames"]) == len(batch_rms)
+    np.testing.assert_allclose(summary["rms_frames"], batch_rms, rtol=1e-4, atol=1e-6)
+    assert summary["avg_pitch_hz"] == pytest.approx(track_pitch(audio, hop_length=512).mean(), rel=1e-3)
+
+    batch_silences = detect_stuttering(audio, rms_frames=batch_rms)["stuttering_timestamps"]
+    assert len(summary["silence_runs"]) == len(batch_silences) > 0
+    for streamed, batch in zip(summary["silence_runs"], batch_silences):
+        assert streamed["start"] == pytest.approx(batch["start"])
+        assert streamed["end"] == pytest.approx(batch["end"])
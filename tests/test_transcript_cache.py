@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+
+from audio_feedback import asr_whisper, transcript_cache
+from audio_feedback.audio_context import AudioContext
+
+
+def test_cache_is_off_unless_configured(monkeypatch):
+    monkeypatch.delenv("TRANSCRIPT_CACHE_DIR", raising=False)
+    monkeypatch.setattr(transcript_cache, "_cache", None)
+    assert transcript_cache.get_transcript_cache() is None
+
+
+def test_cache_directory_is_absolute(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TRANSCRIPT_CACHE_DIR", "cache")
+    monkeypatch.setattr(transcript_cache, "_cache", None)
+    cache = transcript_cache.get_transcript_cache()
+    assert cache.directory == os.path.join(str(tmp_path), "cache")
+
+
+def test_key_depends_on_whisper_version_and_model(tmp_path, monkeypatch):
+    seen = []
+
+    class Recorder(transcript_cache.TranscriptCache):
+        def get(self, key):
+            seen.append(key)
+            return "", 0, None
+
+    monkeypatch.setattr(asr_whisper, "get_transcript_cache", lambda: Recorder(str(tmp_path)))
+    audio = AudioContext(np.zeros(16000, dtype=np.float32))
+    asr_whisper.transcribe_audio(audio, backend=asr_whisper.WhisperBackend("base", "cpu", "fp32"))
+    asr_whisper.transcribe_audio(audio, backend=asr_whisper.WhisperBackend("small", "cpu", "fp32"))
+    monkeypatch.setattr(asr_whisper, "whisper_version", lambda: "20990101")
+    asr_whisper.transcribe_audio(audio, backend=asr_whisper.WhisperBackend("base", "cpu", "fp32"))
+    assert len(set(seen)) == 3
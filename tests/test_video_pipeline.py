@@ -0,0 +1,41 @@
+import time
+
+from video_pipeline import VideoPipeline, merge_stats
+
+
+def _frames(n):
+    return [(index * 15, index) for index in range(n)]
+
+
+def test_pipeline_yields_in_frame_order():
+    pipeline = VideoPipeline(_frames(20), lambda frame: frame * 2, lambda frames: [-f for f in frames],
+                             queue_size=4, batch_sizes={"face": 3})
+    assert list(pipeline) == [(i * 15, i * 2, -i) for i in range(20)]
+
+
+def test_consumer_time_is_not_counted_as_aggregation():
+    pipeline = VideoPipeline(_frames(5), lambda frame: frame, lambda frame: frame)
+    for _ in pipeline:
+        time.sleep(0.02)
+    stages = pipeline.stats()["stages"]
+    assert stages["consume"]["items"] == 5
+    assert stages["consume"]["busy_sec"] >= 0.09
+    assert stages["aggregate"]["busy_sec"] < 0.05
+
+
+def test_merge_stats_combines_shards():
+    shards = []
+    for n in (6, 10):
+        pipeline = VideoPipeline(_frames(n), lambda frame: frame, lambda frames: frames, batch_sizes={"face": 4})
+        list(pipeline)
+        shards.append(pipeline.stats())
+
+    merged = merge_stats(shards + [None])
+    assert merged["shards"] == 2
+    assert merged["wall_sec"] == max(stats["wall_sec"] for stats in shards)
+    assert merged["stages"]["pose"]["items"] == 16
+    assert merged["stages"]["face"]["calls"] == sum(stats["stages"]["face"]["calls"] for stats in shards)
+    assert merged["queues"]["pose"]["puts"] == sum(stats["queues"]["pose"]["puts"] for stats in shards)
+    assert merged["queues"]["pose"]["max_depth"] == max(stats["queues"]["pose"]["max_depth"] for stats in shards)
+    assert merge_stats([]) == {}
+    assert merge_stats([shards[0]]) == dict(shards[0], shards=1)
@@ -12,6 +12,10 @@ import traceback
 # 분석 모듈
 import mainVideo          # mainVideo.run(video_path) -> dict
 import audiomain          # audiomain.amain(video_path, analysis_id, presentation_id) -> dict
+from audio_feedback.transcript_cache import get_transcript_cache
+from audio_feedback.asr_batcher import batcher_stats
+from video_pipeline import pipeline_stats
+from audio_feedback import asr_whisper  # Whisper 모델은 첫 오디오 요청 때 로드 (WHISPER_WARMUP=1이면 기동 시)
 
 app = Flask(__name__)
 
@@ -173,7 +177,8 @@ def process_video(s3_url, analysis_id, presentation_id, callback_url):
 # =========================
 # 작업 실행기 (오디오)
 # =========================
-def process_audio(s3_url, analysis_id, presentation_id, callback_url):
+def process_audio(s3_url, analysis_id, presentation_id, callback_url, asr_profile=None, segment_sec=45,
+                  include_words=False):
     set_status(analysis_id, "IN_PROGRESS")
 
     with tempfile.TemporaryDirectory(prefix="dl_") as tmpdir:
@@ -192,7 +197,8 @@ def process_audio(s3_url, analysis_id, presentation_id, callback_url):
 
         try:
             # 2) 분석 실행 (audiomain.amain이 dict 반환)
-            result_data = audiomain.amain(video_path, analysis_id, presentation_id)
+            result_data = audiomain.amain(video_path, analysis_id, presentation_id, asr_profile=asr_profile,
+                                          segment_sec=segment_sec, include_words=include_words)
             if not isinstance(result_data, dict):
                 raise ValueError("audiomain.amain 결과 형식이 dict가 아닙니다.")
 
@@ -251,9 +257,17 @@ def analyze_audio():
     data = request.get_json()
     presentation_id = data.get("presentationId")
     s3_url = data.get("s3Url")
+    asr_profile = data.get("asrProfile")  # 선택: "accurate"(기본) 또는 "fast"
 
     if not all([presentation_id, s3_url]):
         return jsonify({"error": "presentationId, s3Url은 필수입니다."}), 400
+    if asr_profile is not None and asr_profile not in asr_whisper.DECODE_PROFILES:
+        return jsonify({"error": f"asrProfile은 {', '.join(asr_whisper.DECODE_PROFILES)} 중 하나여야 합니다."}), 400
+    segment_sec = data.get("segmentSec", 45)  # 선택: 구간 길이(초) 또는 "sentence"
+    if segment_sec != "sentence" and (isinstance(segment_sec, bool) or not isinstance(segment_sec, (int, float))
+                                      or segment_sec <= 0):
+        return jsonify({"error": "segmentSec은 양수(초) 또는 \"sentence\"여야 합니다."}), 400
+    include_words = bool(data.get("includeWords", False))  # 선택: 결과에 단어 타임스탬프(열 단위) 포함
 
     analysis_id = f"audio-analysis-uuid-{uuid.uuid4()}"
     set_status(analysis_id, "PENDING")
@@ -262,13 +276,33 @@ def analyze_audio():
 
     t = threading.Thread(
         target=process_audio,
-        args=(s3_url, analysis_id, presentation_id, callback_url),
+        args=(s3_url, analysis_id, presentation_id, callback_url, asr_profile, segment_sec, include_words),
         daemon=False
     )
     t.start()
 
     return jsonify({"analysisId": analysis_id, "status": "PENDING"})
 
+@app.route('/analysis/cache/stats', methods=['GET'])
+def transcript_cache_stats():
+    """전사 캐시 적중/미스 횟수와 크기 (캐시 용량 산정용)"""
+    cache = get_transcript_cache()
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(cache.stats(), enabled=True))
+
+@app.route('/analysis/asr/batcher/stats', methods=['GET'])
+def asr_batcher_stats():
+    """ASR_MICRO_BATCH=1일 때 공유 배처의 배치 수와 평균 배치 크기"""
+    return jsonify(batcher_stats())
+
+@app.route('/analysis/video/pipeline/stats', methods=['GET'])
+def video_pipeline_stats():
+    """VIDEO_PIPELINE=1일 때 마지막 영상 분석의 단계별 사용률과 큐 깊이"""
+    return jsonify(pipeline_stats())
+
 if __name__ == '__main__':
     # 하나의 서버로 통합: 0.0.0.0:5000
+    if os.environ.get("WHISPER_WARMUP") == "1":
+        asr_whisper.get_backend().warm_up()
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,315 @@
+"""Run the decode, pose and face stages of the video analysis as a pipelined graph.
+
+A decoder thread reads sampled frames into two bounded queues. The pose branch
+(mediapipe) and the face branch (SCRFD, landmarks, solvePnP) each run in their own
+thread; onnxruntime, mediapipe and OpenCV release the GIL while they compute, so the
+branches overlap with each other and with decoding. The caller's thread aggregates
+the branch results and yields them in frame order.
+
+Stats are per process: a sharded analysis returns each shard's stats() to the parent,
+which combines them with merge_stats() before record_stats().
+"""
+import queue
+import threading
+import time
+
+_END = object()
+_POLL_SEC = 0.1
+
+_last_stats = None
+_last_stats_lock = threading.Lock()
+
+
+class MonitoredQueue:
+    """Bounded queue that records its depth and how long producers/consumers waited on it."""
+
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = maxsize
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self.puts = 0
+        self.depth_sum = 0
+        self.max_depth = 0
+        self.put_wait_sec = 0.0
+        self.get_wait_sec = 0.0
+
+    def put(self, item, stop):
+        """Put an item, giving up (returns False) once `stop` is set."""
+        started = time.perf_counter()
+        while True:
+            try:
+                self._queue.put(item, timeout=_POLL_SEC)
+                break
+            except queue.Full:
+                if stop.is_set():
+                    return False
+        waited = time.perf_counter() - started
+        depth = self._queue.qsize()
+        with self._lock:
+            self.puts += 1
+            self.depth_sum += depth
+            self.max_depth = max(self.max_depth, depth)
+            self.put_wait_sec += waited
+        return True
+
+    def get_nowait(self):
+        """An item if one is queued right now, else None."""
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def get(self, stop):
+        """Get an item, or _END once `stop` is set."""
+        started = time.perf_counter()
+        while True:
+            try:
+                item = self._queue.get(timeout=_POLL_SEC)
+                break
+            except queue.Empty:
+                if stop.is_set():
+                    return _END
+        with self._lock:
+            self.get_wait_sec += time.perf_counter() - started
+        return item
+
+    def stats(self):
+        return {
+            "capacity": self.maxsize,
+            "max_depth": self.max_depth,
+            "avg_depth": round(self.depth_sum / self.puts, 2) if self.puts else 0.0,
+            "puts": self.puts,
+            "put_wait_sec": round(self.put_wait_sec, 3),
+            "get_wait_sec": round(self.get_wait_sec, 3),
+        }
+
+
+class StageStats:
+    """Items processed and time spent working (not waiting on queues) by one stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.calls = 0
+        self.busy_sec = 0.0
+
+    def add(self, seconds, items=1):
+        self.items += items
+        self.calls += 1
+        self.busy_sec += seconds
+
+    def stats(self, wall_sec):
+        return {
+            "items": self.items,
+            "calls": self.calls,
+            "avg_batch": round(self.items / self.calls, 2) if self.calls else 0.0,
+            "busy_sec": round(self.busy_sec, 3),
+            "utilisation": round(self.busy_sec / wall_sec, 3) if wall_sec > 0 else 0.0,
+        }
+
+
+class VideoPipeline:
+    """Decoder -> (pose branch || face branch) -> ordered aggregation.
+
+    pose_fn(frame) and face_fn(frame) are each called from a single thread, in frame
+    order, so stateful models (mediapipe Pose, PoseEstimator) need no locking.
+    A branch listed in batch_sizes is called with a list of up to that many queued
+    frames instead and returns a list of results.
+    The "aggregate" stage is the reordering of branch results into frame order; the
+    "consume" stage is the time the caller spends on each yielded frame.
+    """
+
+    def __init__(self, sampler, pose_fn, face_fn, queue_size=8, batch_sizes=None):
+        """Build the pipeline.
+
+        Args:
+            sampler: iterable of (frame_index, frame), e.g. a FrameSampler.
+            pose_fn (callable): frame -> pose branch result.
+            face_fn (callable): frame -> face branch result.
+            queue_size (int): capacity of each bounded queue.
+            batch_sizes (dict, optional): branch name -> max frames per call, e.g. {"face": 8}.
+        """
+        self.sampler = sampler
+        self.branches = {"pose": pose_fn, "face": face_fn}
+        self.batch_sizes = {name: 1 for name in self.branches}
+        self.batch_sizes.update(batch_sizes or {})
+        self.queues = {name: MonitoredQueue(name, max(queue_size, self.batch_sizes[name]))
+                       for name in self.branches}
+        self.results = MonitoredQueue("results", queue_size * 2)
+        self.stages = {name: StageStats(name) for name in ["decode", "pose", "face", "aggregate", "consume"]}
+        self.wall_sec = 0.0
+        self._stop = threading.Event()
+        self._error = None
+
+    def _decode(self):
+        try:
+            iterator = iter(self.sampler)
+            seq = 0
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                item = next(iterator, _END)
+                if item is _END:
+                    break
+                self.stages["decode"].add(time.perf_counter() - started)
+                for branch_queue in self.queues.values():
+                    if not branch_queue.put((seq, item), self._stop):
+                        return
+                seq += 1
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for branch_queue in self.queues.values():
+                branch_queue.put(_END, self._stop)
+
+    def _branch(self, name):
+        fn = self.branches[name]
+        batch_size = self.batch_sizes[name]
+        branch_queue = self.queues[name]
+        try:
+            finished = False
+            while not finished:
+                item = branch_queue.get(self._stop)
+                if item is _END:
+                    break
+                items = [item]
+                # 배치 분기: 기다리지 않고 이미 큐에 있는 프레임만 모읍니다.
+                while len(items) < batch_size:
+                    item = branch_queue.get_nowait()
+                    if item is None:
+                        break
+                    if item is _END:
+                        finished = True
+                        break
+                    items.append(item)
+
+                frames = [frame for _, (_, frame) in items]
+                started = time.perf_counter()
+                if batch_size > 1:
+                    results = fn(frames)
+                else:
+                    results = [fn(frames[0])]
+                self.stages[name].add(time.perf_counter() - started, len(items))
+                for (seq, (frame_index, _)), result in zip(items, results):
+                    if not self.results.put((seq, frame_index, name, result), self._stop):
+                        return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self.results.put((None, None, name, _END), self._stop)
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def __iter__(self):
+        """Yield (frame_index, pose_result, face_result) in frame order."""
+        threads = [threading.Thread(target=self._decode, name="video-decode", daemon=True)]
+        threads += [threading.Thread(target=self._branch, args=(name,), name=f"video-{name}", daemon=True)
+                    for name in self.branches]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        pending = {}
+        next_seq = 0
+        open_branches = len(self.branches)
+        try:
+            while open_branches:
+                item = self.results.get(self._stop)
+                if item is _END:
+                    break
+                seq, frame_index, name, result = item
+                if result is _END:
+                    open_branches -= 1
+                    continue
+                aggregate_started = time.perf_counter()
+                entry = pending.setdefault(seq, {"index": frame_index})
+                entry[name] = result
+                # 두 분기 결과가 모두 모인 프레임부터 순서대로 내보냅니다.
+                ready = []
+                while next_seq in pending and len(pending[next_seq]) == len(self.branches) + 1:
+                    ready.append(pending.pop(next_seq))
+                    next_seq += 1
+                self.stages["aggregate"].add(time.perf_counter() - aggregate_started)
+                for entry in ready:
+                    consume_started = time.perf_counter()
+                    yield entry["index"], entry["pose"], entry["face"]
+                    self.stages["consume"].add(time.perf_counter() - consume_started)
+            if self._error is not None:
+                raise self._error
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.wall_sec = time.perf_counter() - started
+
+    def stats(self):
+        """Per-stage utilisation (busy time / wall time) and per-queue depth and wait times."""
+        return {
+            "wall_sec": round(self.wall_sec, 3),
+            "stages": {name: stage.stats(self.wall_sec) for name, stage in self.stages.items()},
+            "queues": {name: q.stats() for name, q in list(self.queues.items()) + [("results", self.results)]},
+        }
+
+
+def merge_stats(shard_stats):
+    """Combine stats() of pipelines that ran concurrently (e.g. one per time shard).
+
+    Counts and busy/wait times are summed, wall_sec is the longest shard, utilisation
+    is busy time over the summed shard wall times, and queue depths are weighted by puts.
+    """
+    shard_stats = [stats for stats in shard_stats if stats]
+    if not shard_stats:
+        return {}
+    if len(shard_stats) == 1:
+        return dict(shard_stats[0], shards=1)
+    total_wall = sum(stats["wall_sec"] for stats in shard_stats)
+
+    stages = {}
+    for name in shard_stats[0]["stages"]:
+        parts = [stats["stages"][name] for stats in shard_stats]
+        items = sum(part["items"] for part in parts)
+        calls = sum(part["calls"] for part in parts)
+        busy_sec = sum(part["busy_sec"] for part in parts)
+        stages[name] = {
+            "items": items,
+            "calls": calls,
+            "avg_batch": round(items / calls, 2) if calls else 0.0,
+            "busy_sec": round(busy_sec, 3),
+            "utilisation": round(busy_sec / total_wall, 3) if total_wall > 0 else 0.0,
+        }
+
+    queues = {}
+    for name in shard_stats[0]["queues"]:
+        parts = [stats["queues"][name] for stats in shard_stats]
+        puts = sum(part["puts"] for part in parts)
+        queues[name] = {
+            "capacity": parts[0]["capacity"],
+            "max_depth": max(part["max_depth"] for part in parts),
+            "avg_depth": round(sum(part["avg_depth"] * part["puts"] for part in parts) / puts, 2) if puts else 0.0,
+            "puts": puts,
+            "put_wait_sec": round(sum(part["put_wait_sec"] for part in parts), 3),
+            "get_wait_sec": round(sum(part["get_wait_sec"] for part in parts), 3),
+        }
+
+    return {
+        "wall_sec": max(stats["wall_sec"] for stats in shard_stats),
+        "stages": stages,
+        "queues": queues,
+        "shards": len(shard_stats),
+    }
+
+
+def record_stats(stats):
+    """Keep the most recent pipeline stats for pipeline_stats()."""
+    global _last_stats
+    with _last_stats_lock:
+        _last_stats = stats
+
+
+def pipeline_stats():
+    """Stats of the most recent pipelined video analysis in this process (empty dict if none)."""
+    with _last_stats_lock:
+        return _last_stats or {}
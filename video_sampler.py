@@ -0,0 +1,269 @@
+"""Read only the sampled frames of a video.
+
+FrameSampler skips frames between samples with VideoCapture.grab(), which advances the
+demuxer/decoder without the BGR conversion and copy that retrieve() does.
+FFmpegFrameSampler lets ffmpeg select the sampled frames and scale them to a working
+resolution before the pixel-format conversion, so decode output, color conversion and
+every later stage run at the working resolution instead of the upload resolution.
+"""
+import math
+import os
+import threading
+
+import cv2
+import ffmpeg
+import numpy as np
+
+# 기본 샘플 간격(초). 30fps 영상에서 기존의 15프레임당 1프레임과 같습니다.
+DEFAULT_SAMPLE_SEC = 0.5
+# FPS를 읽지 못하는 스트림에서 가정하는 값
+FALLBACK_FPS = 30.0
+
+
+def sample_index(k, step):
+    """Frame index of the k-th sample (k >= 1) when sampling every `step` frames.
+
+    Frame n is sampled when some k * step falls in [n + 0.5, n + 1.5).
+    With step = 15 this is frames 14, 29, 44, ... (every 15th frame).
+    """
+    return max(0, int(math.floor(k * step - 0.5)))
+
+
+def _select_expr(step, first_frame=0):
+    """ffmpeg select filter expression that keeps the same frames as sample_index.
+
+    first_frame: source index of the first decoded frame (n = 0) after an input seek.
+    """
+    return f"gt(ceil((n+{first_frame + 1.5!r})/{step!r}),ceil((n+{first_frame + 0.5!r})/{step!r}))"
+
+
+def working_size(width, height, max_side=None):
+    """Working resolution for a frame: the long side is at most max_side, aspect ratio kept, even sizes."""
+    if not max_side or max(width, height) <= max_side:
+        return width, height
+    scale = max_side / float(max(width, height))
+    return max(2, int(round(width * scale / 2)) * 2), max(2, int(round(height * scale / 2)) * 2)
+
+
+class FrameSampler:
+    """Yield one frame every `interval_sec` seconds of video.
+
+    The k-th sample is frame sample_index(k, interval_sec * fps),
+    so sampling cost depends on the video duration, not on its frame rate.
+    first_sample/stop_sample restrict the samples to k in [first_sample, stop_sample)
+    so a video can be split into time shards that together yield the same samples.
+    """
+
+    def __init__(self, video_path, interval_sec=DEFAULT_SAMPLE_SEC, first_sample=1, stop_sample=None):
+        """Open a video for sampling.
+
+        Args:
+            video_path (str): video file path.
+            interval_sec (float): seconds between sampled frames.
+            first_sample (int): first sample number (1-based) to yield.
+            stop_sample (int, optional): sample number to stop before. None reads to the end.
+        """
+        assert interval_sec > 0, "interval_sec must be positive"
+        self.cap = cv2.VideoCapture(video_path)
+        self.interval_sec = interval_sec
+        self.first_sample = first_sample
+        self.stop_sample = stop_sample
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps and fps > 0 and math.isfinite(fps) else FALLBACK_FPS
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # 전체 프레임 수(일부 코덱/스트림은 -1 또는 0일 수 있음)
+        frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_count = frame_count if frame_count > 0 else None
+        # 프레임을 원본 해상도 그대로 내보냅니다.
+        self.frame_width, self.frame_height = self.width, self.height
+
+    @property
+    def step(self):
+        """Sample interval in frames (may be fractional)."""
+        return self.interval_sec * self.fps
+
+    def sample_index(self, k):
+        """Frame index of the k-th sample (k >= 1)."""
+        return sample_index(k, self.step)
+
+    def total_samples(self):
+        """Number of samples in the whole video, or None if the frame count is unknown."""
+        if self.frame_count is None:
+            return None
+        return min(self.frame_count, int(math.ceil((self.frame_count + 0.5) / self.step)) - 1)
+
+    def expected_samples(self):
+        """Number of samples this sampler yields, or None if the frame count is unknown."""
+        total = self.total_samples()
+        if total is None:
+            return None
+        last = total if self.stop_sample is None else min(total, self.stop_sample - 1)
+        return max(0, last - self.first_sample + 1)
+
+    def timestamp(self, frame_index):
+        """Presentation time (seconds) of a frame index."""
+        return frame_index / self.fps
+
+    def to_source(self, points):
+        """Map (x, y) points on a yielded frame to source frame coordinates."""
+        points = np.asarray(points, dtype=np.float64)
+        return points * np.array([self.width / float(self.frame_width), self.height / float(self.frame_height)])
+
+    def indices(self):
+        """Sampled frame indices in order (one per frame even when the interval is shorter than a frame)."""
+        last = -1
+        k = self.first_sample
+        while self.stop_sample is None or k < self.stop_sample:
+            target = self.sample_index(k)
+            k += 1
+            if target > last:
+                last = target
+                yield target
+
+    def __iter__(self):
+        """Yield (frame_index, frame) for each sampled frame in order."""
+        position = 0
+        if self.first_sample > 1:
+            # 샤드 시작 샘플로 바로 이동합니다.
+            position = self.sample_index(self.first_sample)
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+        for target in self.indices():
+            while position < target:
+                if not self.cap.grab():
+                    return
+                position += 1
+            if not self.cap.grab():
+                return
+            position += 1
+            ok, frame = self.cap.retrieve()
+            if not ok:
+                return
+            yield target, frame
+
+    def close(self):
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _probe_video(video_path):
+    """(width, height, fps, frame_count) of the first video stream, after display rotation."""
+    probe = ffmpeg.probe(video_path)
+    stream = next(s for s in probe['streams'] if s.get('codec_type') == 'video')
+    width, height = int(stream['width']), int(stream['height'])
+
+    rotation = stream.get('tags', {}).get('rotate')
+    for side_data in stream.get('side_data_list', []):
+        rotation = side_data.get('rotation', rotation)
+    # ffmpeg는 회전 메타데이터대로 프레임을 돌려서 내보냅니다.
+    if rotation is not None and abs(int(float(rotation))) % 180 == 90:
+        width, height = height, width
+
+    fps = 0.0
+    rate = stream.get('avg_frame_rate') or stream.get('r_frame_rate') or '0/1'
+    num, _, den = rate.partition('/')
+    if float(den or 1) > 0:
+        fps = float(num) / float(den or 1)
+
+    frame_count = int(stream.get('nb_frames') or 0)
+    if frame_count <= 0 and fps > 0:
+        duration = float(stream.get('duration') or probe['format'].get('duration') or 0)
+        frame_count = int(round(duration * fps))
+    return width, height, fps, frame_count
+
+
+class FFmpegFrameSampler(FrameSampler):
+    """FrameSampler whose frames are selected and downscaled inside ffmpeg.
+
+    Only the sampled frames leave the decoder, already scaled to the working resolution
+    (long side <= max_side) and converted to BGR at that size.
+    Coordinates on yielded frames map back to the source frame with to_source().
+    """
+
+    def __init__(self, video_path, interval_sec=DEFAULT_SAMPLE_SEC, max_side=None, first_sample=1, stop_sample=None):
+        """Start an ffmpeg process that emits the sampled frames.
+
+        Args:
+            video_path (str): video file path.
+            interval_sec (float): seconds between sampled frames.
+            max_side (int, optional): longest side of the working resolution. None keeps the source size.
+            first_sample (int): first sample number (1-based) to yield.
+            stop_sample (int, optional): sample number to stop before. None reads to the end.
+        """
+        assert interval_sec > 0, "interval_sec must be positive"
+        assert os.path.exists(video_path), f"File not found: {video_path}"
+        self.interval_sec = interval_sec
+        self.first_sample = first_sample
+        self.stop_sample = stop_sample
+
+        width, height, fps, frame_count = _probe_video(video_path)
+        self.fps = fps if fps > 0 and math.isfinite(fps) else FALLBACK_FPS
+        self.width, self.height = width, height
+        self.frame_count = frame_count if frame_count > 0 else None
+        self.frame_width, self.frame_height = working_size(width, height, max_side)
+
+        input_args = {}
+        first_frame = 0
+        if first_sample > 1:
+            # 샤드 시작 샘플 바로 앞으로 정확한 입력 탐색을 하고, select의 프레임 번호를 그만큼 옮깁니다.
+            first_frame = self.sample_index(first_sample)
+            input_args['ss'] = (first_frame - 0.5) / self.fps
+        output_args = {}
+        if stop_sample is not None:
+            # 마지막 샘플 뒤로는 디코딩하지 않습니다.
+            output_args['vframes'] = max(0, stop_sample - first_sample)
+
+        stream = ffmpeg.input(video_path, **input_args).video.filter('select', _select_expr(self.step, first_frame))
+        if (self.frame_width, self.frame_height) != (width, height):
+            stream = stream.filter('scale', self.frame_width, self.frame_height, flags='area')
+        self.process = (
+            stream
+            .output('pipe:', format='rawvideo', pix_fmt='bgr24', vsync='passthrough', **output_args)
+            .global_args('-loglevel', 'error')
+            .run_async(pipe_stdout=True, pipe_stderr=True)
+        )
+        # stderr는 별도 스레드에서 비워 파이프가 가득 차서 멈추는 일이 없도록 합니다.
+        self._stderr_chunks = []
+        self._drain = threading.Thread(target=lambda: self._stderr_chunks.append(self.process.stderr.read()),
+                                       daemon=True)
+        self._drain.start()
+
+    def _read_frame(self):
+        frame = np.empty((self.frame_height, self.frame_width, 3), dtype=np.uint8)
+        view = memoryview(frame).cast('B')
+        filled = 0
+        while filled < len(view):
+            n = self.process.stdout.readinto(view[filled:])
+            if not n:
+                return None
+            filled += n
+        return frame
+
+    def __iter__(self):
+        """Yield (frame_index, frame) for each sampled frame in order."""
+        for target in self.indices():
+            frame = self._read_frame()
+            if frame is None:
+                return
+            yield target, frame
+
+    def close(self):
+        if self.process.poll() is None:
+            # 소비자가 중간에 멈춘 경우: 남은 디코딩은 버립니다.
+            self.process.kill()
+        self.process.stdout.close()
+        self.process.wait()
+        self._drain.join()
+
+
+def open_sampler(video_path, interval_sec=DEFAULT_SAMPLE_SEC, max_side=None, first_sample=1, stop_sample=None):
+    """FFmpegFrameSampler when a working resolution is requested, otherwise the OpenCV FrameSampler."""
+    if max_side:
+        return FFmpegFrameSampler(video_path, interval_sec, max_side, first_sample, stop_sample)
+    return FrameSampler(video_path, interval_sec, first_sample, stop_sample)
@@ -0,0 +1,119 @@
+"""
+단어 시각 근사 모드 비교 도구.
+같은 Whisper 전사(segment)에 대해 DTW 단어 정렬 결과를 기준으로
+근사 모드("segment", "energy")가 문장 구간과 말더듬 단어/문장 매칭을 얼마나 바꾸는지 측정합니다.
+
+사용 예:
+    python word_timing_benchmark.py sample_input/123.mp4 --output word_timing.json
+"""
+import argparse
+import copy
+import json
+import time
+
+from asr_benchmark import load_audio
+from audio_feedback.asr_metrics import timestamp_drift
+from audio_feedback.asr_whisper import get_backend, get_profile, DEFAULT_MODEL_SIZE
+from audio_feedback.stuttering_detector import detect_stuttering
+from audio_feedback.utils import get_sentence_timestamps, get_stutter_words_at_timestamp
+from audio_feedback.word_timing import add_word_timing
+
+APPROXIMATE_MODES = ("segment", "energy")
+
+
+def collect_words(result):
+    return [{"word": w["word"], "start": w["start"], "end": w["end"]}
+            for segment in result["segments"] for w in segment.get("words", [])]
+
+
+def attribute_stutters(stuttering_timestamps, word_timestamps):
+    """audiomain과 같은 방식으로 말더듬 구간마다 (단어, 문장)을 찾습니다."""
+    sentences = get_sentence_timestamps(word_timestamps)
+    attributions = []
+    for timestamp in stuttering_timestamps:
+        words = get_stutter_words_at_timestamp(timestamp, word_timestamps)
+        sentence = ""
+        for candidate in sentences:
+            if timestamp['start'] >= candidate['start'] and timestamp['end'] <= candidate['end']:
+                sentence = candidate['text']
+                break
+        attributions.append((words, sentence))
+    return sentences, attributions
+
+
+def compare(reference, candidate):
+    """DTW 기준 (sentences, attributions)와 근사 모드 결과의 차이"""
+    ref_sentences, ref_attr = reference
+    hyp_sentences, hyp_attr = candidate
+    as_words = lambda sentences: [{"word": s["text"], "start": s["start"], "end": s["end"]} for s in sentences]
+    total = len(ref_attr)
+    return {
+        "sentences": len(hyp_sentences),
+        "sentence_drift": timestamp_drift(as_words(ref_sentences), as_words(hyp_sentences)),
+        "stutter_word_agreement": round(sum(r[0] == h[0] for r, h in zip(ref_attr, hyp_attr)) / total, 4) if total else 1.0,
+        "stutter_sentence_agreement": round(sum(r[1] == h[1] for r, h in zip(ref_attr, hyp_attr)) / total, 4) if total else 1.0,
+    }
+
+
+def benchmark(paths, backend_name=None, model_size=DEFAULT_MODEL_SIZE):
+    backend = get_backend(backend_name, model_size)
+    backend.warm_up()
+    options = {key: value for key, value in get_profile("accurate").items() if key != "word_timing"}
+
+    rows = []
+    for path in paths:
+        audio = load_audio(path)
+        rms_frames = audio.rms(frame_length=2048, hop_length=512)
+        stutters = detect_stuttering(audio)['stuttering_timestamps']
+
+        # 같은 디코딩 결과에서 DTW 단어 정렬 시간만 따로 잽니다.
+        start = time.time()
+        plain = backend.transcribe(audio.asr_input(), word_timestamps=False, **options)
+        plain_sec = time.time() - start
+        start = time.time()
+        aligned = backend.transcribe(audio.asr_input(), word_timestamps=True, **options)
+        aligned_sec = time.time() - start
+
+        reference_words = collect_words(aligned)
+        reference = attribute_stutters(stutters, reference_words)
+        row = {
+            "file": path,
+            "audio_sec": round(audio.duration, 2),
+            "decode_sec": round(plain_sec, 2),
+            "decode_with_dtw_sec": round(aligned_sec, 2),
+            "stutters": len(stutters),
+            "dtw_sentences": len(reference[0]),
+        }
+        for mode in APPROXIMATE_MODES:
+            words = collect_words(add_word_timing(copy.deepcopy(plain), mode, rms_frames, audio.sr))
+            row[mode] = dict(compare(reference, attribute_stutters(stutters, words)),
+                             word_drift=timestamp_drift(reference_words, words))
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DTW 단어 정렬 대비 근사 단어 시각의 문장/말더듬 결과 차이")
+    parser.add_argument("paths", nargs="+", help="오디오 또는 영상 파일")
+    parser.add_argument("--backend", default=None, help="ASR 백엔드 이름 (기본: ASR_BACKEND)")
+    parser.add_argument("--model-size", default=DEFAULT_MODEL_SIZE)
+    parser.add_argument("--output", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    rows = benchmark(args.paths, args.backend, args.model_size)
+    for row in rows:
+        print(f"{row['file']}: {row['audio_sec']}s | decode {row['decode_sec']}s, "
+              f"with DTW {row['decode_with_dtw_sec']}s | stutters {row['stutters']}")
+        for mode in APPROXIMATE_MODES:
+            result = row[mode]
+            print(f"  {mode}: sentence drift mean {result['sentence_drift']['mean_sec']}s "
+                  f"max {result['sentence_drift']['max_sec']}s | word drift mean {result['word_drift']['mean_sec']}s | "
+                  f"stutter words {result['stutter_word_agreement']:.1%} sentences {result['stutter_sentence_agreement']:.1%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()